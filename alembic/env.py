@@ -1,9 +1,11 @@
+import os
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
+from dotenv import load_dotenv
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -16,9 +18,27 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+from app.models import Base
+from app.core.config import settings
+from app.db import build_database_url
+
+target_metadata = Base.metadata
+
+# The app reads .env through Settings only; this CLI loads it for DATABASE_URL too
+load_dotenv()
+
+# DATABASE_URL wins (CI, one-off runs); otherwise use the app's primary database
+config.set_main_option(
+    "sqlalchemy.url",
+    (os.getenv("DATABASE_URL") or build_database_url(settings.POSTGRES_SERVER, settings.POSTGRES_PORT)).replace("%", "%%"),
+)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # PostGIS-owned tables are not part of our schema
+    if type_ == "table" and name in ("spatial_ref_sys",):
+        return False
+    return True
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -44,6 +64,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -57,6 +78,12 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Callers (e.g. the test suite) may hand us an open connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -64,12 +91,18 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
+        _run_migrations(connection)
+
 
-        with context.begin_transaction():
-            context.run_migrations()
+def _run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
 
 
 if context.is_offline_mode():
@@ -0,0 +1,187 @@
+"""baseline schema
+
+Mirrors what Base.metadata.create_all produced before migrations existed,
+including the spatial indexes GeoAlchemy2 created implicitly for every
+geography column. Existing databases should be stamped at this revision.
+
+Revision ID: 5b0f3c1d2a47
+Revises: 
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geography
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5b0f3c1d2a47'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _point() -> Geography:
+    return Geography(geometry_type='POINT', srid=4326, spatial_index=False)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.create_table(
+        'drivers',
+        sa.Column('driver_id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('contact_info', postgresql.JSONB(), nullable=False),
+        sa.Column('vehicle_details', postgresql.JSONB(), nullable=False),
+        sa.Column('registration_date', sa.DateTime()),
+        sa.Column('status', sa.String(length=20)),
+        sa.CheckConstraint("status IN ('active', 'inactive', 'suspended')", name='valid_driver_status'),
+    )
+    op.create_index('idx_driver_status', 'drivers', ['status'])
+    op.create_index('idx_driver_registration', 'drivers', ['registration_date'])
+
+    op.create_table(
+        'brands',
+        sa.Column('brand_id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('contact_info', postgresql.JSONB()),
+        sa.Column('industry', sa.String(length=50)),
+        sa.Column('registered_at', sa.DateTime()),
+    )
+
+    op.create_table(
+        'sessions',
+        sa.Column('session_id', sa.Integer(), primary_key=True),
+        sa.Column('driver_id', sa.Integer(), sa.ForeignKey('drivers.driver_id')),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime()),
+        sa.Column('total_distance_km', sa.Numeric(10, 2)),
+        sa.Column('status', sa.String(length=20)),
+        sa.Column('completion_status', sa.String(length=20)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.CheckConstraint('end_time IS NULL OR end_time > start_time', name='valid_session_timeline'),
+    )
+
+    op.create_table(
+        'campaigns',
+        sa.Column('campaign_id', sa.Integer(), primary_key=True),
+        sa.Column('brand_id', sa.Integer(), sa.ForeignKey('brands.brand_id')),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('budget', sa.Numeric(10, 2)),
+        sa.Column('target_audience', postgresql.JSONB()),
+        sa.Column('status', sa.String(length=20)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('actual_spend', sa.Numeric(10, 2)),
+        sa.Column('performance_metrics', postgresql.JSONB()),
+        sa.CheckConstraint('end_date >= start_date', name='valid_campaign_dates'),
+        sa.CheckConstraint('actual_spend <= budget', name='budget_limit'),
+    )
+
+    op.create_table(
+        'coordinates',
+        sa.Column('coord_id', sa.Integer(), primary_key=True),
+        sa.Column('session_id', sa.Integer(), sa.ForeignKey('sessions.session_id')),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('location', _point()),
+        sa.Column('speed', sa.Float()),
+        sa.Column('altitude', sa.Float()),
+        sa.Column('accuracy', sa.Float()),
+        sa.Column('bearing', sa.Float()),
+    )
+    op.create_index('idx_coordinates_location', 'coordinates', ['location'], postgresql_using='gist')
+
+    op.create_table(
+        'impressions',
+        sa.Column('impression_id', sa.Integer(), primary_key=True),
+        sa.Column('campaign_id', sa.Integer(), sa.ForeignKey('campaigns.campaign_id')),
+        sa.Column('location', _point()),
+        sa.Column('timestamp', sa.DateTime()),
+        sa.Column('impression_count', sa.Integer()),
+    )
+    op.create_index('idx_impressions_location', 'impressions', ['location'], postgresql_using='gist')
+
+    op.create_table(
+        'reports',
+        sa.Column('report_id', sa.Integer(), primary_key=True),
+        sa.Column('campaign_id', sa.Integer(), sa.ForeignKey('campaigns.campaign_id')),
+        sa.Column('generated_at', sa.DateTime()),
+        sa.Column('metrics', postgresql.JSONB()),
+    )
+
+    op.create_table(
+        'audit_logs',
+        sa.Column('log_id', sa.Integer(), primary_key=True),
+        sa.Column('entity_type', sa.String(length=50), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('changes', postgresql.JSONB()),
+        sa.Column('performed_by', sa.Integer()),
+        sa.Column('performed_at', sa.DateTime()),
+        sa.Column('ip_address', sa.String(length=45)),
+    )
+
+    op.create_table(
+        'archived_sessions',
+        sa.Column('session_id', sa.Integer(), primary_key=True),
+        sa.Column('driver_id', sa.Integer(), sa.ForeignKey('drivers.driver_id')),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime()),
+        sa.Column('total_distance_km', sa.Numeric(10, 2)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('archived_at', sa.DateTime()),
+    )
+
+    op.create_table(
+        'archived_coordinates',
+        sa.Column('coord_id', sa.Integer(), primary_key=True),
+        sa.Column('session_id', sa.Integer(), sa.ForeignKey('sessions.session_id')),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('location', _point()),
+        sa.Column('speed', sa.Float()),
+        sa.Column('altitude', sa.Float()),
+        sa.Column('bearing', sa.Float()),
+        sa.Column('accuracy', sa.Float()),
+        sa.Column('archived_at', sa.DateTime()),
+    )
+    op.create_index(
+        'idx_archived_coordinates_location', 'archived_coordinates', ['location'], postgresql_using='gist'
+    )
+
+    op.create_table(
+        'pois',
+        sa.Column('poi_id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('category', sa.String(length=50)),
+        sa.Column('location', _point()),
+        sa.Column('footfall_estimate', sa.Integer()),
+        sa.Column('peak_hours', postgresql.JSONB()),
+        sa.Column('demographic_data', postgresql.JSONB()),
+        sa.Column('operational_hours', postgresql.JSONB()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('idx_pois_location', 'pois', ['location'], postgresql_using='gist')
+
+    op.create_table(
+        'billing_records',
+        sa.Column('billing_id', sa.Integer(), primary_key=True),
+        sa.Column('campaign_id', sa.Integer(), sa.ForeignKey('campaigns.campaign_id')),
+        sa.Column('brand_id', sa.Integer(), sa.ForeignKey('brands.brand_id')),
+        sa.Column('amount', sa.Numeric(10, 2)),
+        sa.Column('billing_date', sa.Date(), nullable=False),
+        sa.Column('payment_status', sa.String(length=20)),
+        sa.Column('payment_date', sa.DateTime()),
+        sa.Column('invoice_number', sa.String(length=50), unique=True),
+    )
+
+
+def downgrade() -> None:
+    for table in (
+        'billing_records', 'pois', 'archived_coordinates', 'archived_sessions', 'audit_logs',
+        'reports', 'impressions', 'coordinates', 'campaigns', 'sessions', 'brands', 'drivers',
+    ):
+        op.drop_table(table)
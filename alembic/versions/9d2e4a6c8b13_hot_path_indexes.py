@@ -0,0 +1,54 @@
+"""hot path indexes
+
+The indexes below used to sit in a module-level __table_args__ in
+app/models.py that was attached to no table, so they never existed.
+Built CONCURRENTLY so they can be applied to a live database.
+
+Revision ID: 9d2e4a6c8b13
+Revises: 5b0f3c1d2a47
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2e4a6c8b13'
+down_revision: Union[str, None] = '5b0f3c1d2a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    # name, table, columns, extra kwargs
+    ('idx_coordinates_session_time', 'coordinates', ['session_id', 'timestamp'], {}),
+    ('idx_coordinates_timestamp_brin', 'coordinates', ['timestamp'], {'postgresql_using': 'brin'}),
+    ('idx_sessions_driver_start', 'sessions', ['driver_id', 'start_time'], {}),
+    ('idx_sessions_driver_active', 'sessions', ['driver_id'], {'postgresql_where': sa.text("status = 'active'")}),
+    ('idx_campaign_status_dates', 'campaigns', ['status', 'start_date', 'end_date'], {}),
+    ('idx_impressions_campaign_time', 'impressions', ['campaign_id', 'timestamp'], {}),
+    ('idx_poi_location', 'pois', ['location'], {'postgresql_using': 'gist'}),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs
+            )
+        # Superseded by idx_poi_location
+        op.drop_index('idx_pois_location', table_name='pois', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_pois_location', 'pois', ['location'],
+            postgresql_using='gist', postgresql_concurrently=True, if_not_exists=True,
+        )
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
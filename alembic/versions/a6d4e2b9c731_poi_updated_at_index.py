@@ -0,0 +1,31 @@
+"""poi updated_at index
+
+Lets the POI footfall precompute fetch only rows changed since its last
+refresh.
+
+Revision ID: a6d4e2b9c731
+Revises: f3a9c2e6d518
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d4e2b9c731'
+down_revision: Union[str, None] = 'f3a9c2e6d518'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_pois_updated_at', 'pois', ['updated_at'], postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_pois_updated_at', table_name='pois', postgresql_concurrently=True, if_exists=True)
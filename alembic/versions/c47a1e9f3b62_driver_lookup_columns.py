@@ -0,0 +1,64 @@
+"""driver lookup columns
+
+Adds generated phone / plate_number columns extracted from the JSONB
+documents, unique indexes on both, and a trigram index for name search.
+An empty plate_number counts as missing, as in the driver listing: the
+legacy `plate` stands in, and drivers with neither get NULL, which
+neither matches searches nor collides in the unique index.
+Adding a stored generated column rewrites the drivers table; the unique
+indexes fail if duplicate phones or plates already exist, which must be
+resolved first.
+
+Revision ID: c47a1e9f3b62
+Revises: 9d2e4a6c8b13
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47a1e9f3b62'
+down_revision: Union[str, None] = '9d2e4a6c8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        'drivers',
+        sa.Column('phone', sa.Text(), sa.Computed("contact_info->>'phone'", persisted=True)),
+    )
+    op.add_column(
+        'drivers',
+        sa.Column(
+            'plate_number',
+            sa.Text(),
+            sa.Computed("COALESCE(NULLIF(vehicle_details->>'plate_number', ''), vehicle_details->>'plate')", persisted=True),
+        ),
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_drivers_phone', 'drivers', ['phone'], unique=True,
+            postgresql_ops={'phone': 'text_pattern_ops'}, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'uq_drivers_plate_number', 'drivers', ['plate_number'], unique=True,
+            postgresql_ops={'plate_number': 'text_pattern_ops'}, postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_drivers_name_trgm', 'drivers', ['name'], postgresql_using='gist',
+            postgresql_ops={'name': 'gist_trgm_ops'}, postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_drivers_name_trgm', table_name='drivers')
+    op.drop_index('uq_drivers_plate_number', table_name='drivers')
+    op.drop_index('uq_drivers_phone', table_name='drivers')
+    op.drop_column('drivers', 'plate_number')
+    op.drop_column('drivers', 'phone')
@@ -0,0 +1,51 @@
+"""one active session per driver
+
+Replaces the partial index on active sessions with a unique one. Drivers
+that already have several active sessions keep their newest; the older
+ones are closed with completion_status 'superseded'.
+
+Revision ID: e81b5d7f2c94
+Revises: c47a1e9f3b62
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81b5d7f2c94'
+down_revision: Union[str, None] = 'c47a1e9f3b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        UPDATE sessions
+        SET status = 'completed',
+            completion_status = 'superseded',
+            end_time = GREATEST(timezone('utc', now()), start_time + interval '1 second')
+        WHERE status = 'active'
+          AND session_id NOT IN (
+              SELECT max(session_id) FROM sessions WHERE status = 'active' GROUP BY driver_id
+          )
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_sessions_driver_active', 'sessions', ['driver_id'], unique=True,
+            postgresql_where=sa.text("status = 'active'"), postgresql_concurrently=True,
+        )
+        op.drop_index('idx_sessions_driver_active', table_name='sessions', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_sessions_driver_active', 'sessions', ['driver_id'],
+            postgresql_where=sa.text("status = 'active'"), postgresql_concurrently=True,
+        )
+        op.drop_index('uq_sessions_driver_active', table_name='sessions', postgresql_concurrently=True)
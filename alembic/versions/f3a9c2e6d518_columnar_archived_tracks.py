@@ -0,0 +1,242 @@
+"""columnar archived tracks
+
+Replaces archived_coordinates (one row per point) with archived_tracks (one
+row per session of compressed column arrays) and compacts the existing
+archive into it, one session at a time.
+
+Coordinates are quantized on the way in (1e-7 degrees, 0.01 for speed,
+altitude, bearing and accuracy), so a downgrade restores the points at that
+precision.
+
+Revision ID: f3a9c2e6d518
+Revises: e81b5d7f2c94
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import itertools
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Sequence, Union
+
+from alembic import op
+import geoalchemy2
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c2e6d518'
+down_revision: Union[str, None] = 'e81b5d7f2c94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Encoding version 1, frozen here: app.services.archive_service may move on
+# to newer layouts, but this revision must keep writing and reading this one.
+ENCODING = 1
+FLOAT_COLUMNS = {
+    'latitudes': 1e7,
+    'longitudes': 1e7,
+    'speeds': 100.0,
+    'altitudes': 100.0,
+    'bearings': 100.0,
+    'accuracies': 100.0,
+}
+INTEGER_COLUMNS = ('coord_ids', 'timestamps')
+ARRAY_COLUMNS = INTEGER_COLUMNS + tuple(FLOAT_COLUMNS)
+
+_HEADER = struct.Struct('<IB?d')
+_WIDTHS = tuple(np.dtype(code) for code in ('<u1', '<u2', '<u4', '<u8'))
+
+
+def encode_column(values: np.ndarray, scale: float = 1.0) -> bytes:
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        nulls = np.isnan(values)
+        integers = np.rint(values[~nulls] * scale).astype(np.int64)
+    else:
+        nulls = np.zeros(len(values), dtype=bool)
+        integers = values.astype(np.int64)
+
+    deltas = np.diff(integers, prepend=np.int64(0))
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+    largest = int(zigzag.max()) if zigzag.size else 0
+    width = next(i for i, dtype in enumerate(_WIDTHS) if largest <= np.iinfo(dtype).max)
+
+    has_nulls = bool(nulls.any())
+    parts = [_HEADER.pack(len(values), width, has_nulls, scale)]
+    if has_nulls:
+        parts.append(np.packbits(nulls).tobytes())
+    parts.append(zigzag.astype(_WIDTHS[width]).tobytes())
+    return zlib.compress(b''.join(parts), 6)
+
+
+def decode_column(blob: bytes, as_float: bool = True) -> np.ndarray:
+    raw = zlib.decompress(blob)
+    count, width, has_nulls, scale = _HEADER.unpack_from(raw)
+    offset = _HEADER.size
+    nulls = None
+    if has_nulls:
+        nbytes = (count + 7) // 8
+        nulls = np.unpackbits(np.frombuffer(raw, np.uint8, nbytes, offset), count=count).astype(bool)
+        offset += nbytes
+
+    zigzag = np.frombuffer(raw, _WIDTHS[width], offset=offset).astype(np.uint64)
+    deltas = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+    integers = np.cumsum(deltas)
+    if not as_float:
+        return integers
+
+    values = np.full(count, np.nan)
+    if nulls is None:
+        values[:] = integers / scale
+    else:
+        values[~nulls] = integers / scale
+    return values
+
+
+def track_from_rows(session_id: int, rows: Iterable[Sequence]) -> Dict[str, Any]:
+    """archived_tracks values from (coord_id, timestamp, latitude, longitude,
+    speed, altitude, bearing, accuracy) rows."""
+    rows = list(rows)
+    coord_ids, timestamps, *floats = list(zip(*rows)) if rows else [()] * 8
+    columns = {
+        'coord_ids': np.asarray(coord_ids, dtype=np.int64),
+        'timestamps': np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64),
+    }
+    for name, values in zip(FLOAT_COLUMNS, floats):
+        columns[name] = np.asarray(values, dtype=np.float64)
+
+    order = np.lexsort((columns['coord_ids'], columns['timestamps']))
+    columns = {name: values[order] for name, values in columns.items()}
+
+    times = columns['timestamps'].astype('datetime64[us]')
+    track = {
+        'session_id': session_id,
+        'encoding': ENCODING,
+        'point_count': len(times),
+        'start_time': times[0].item() if len(times) else None,
+        'end_time': times[-1].item() if len(times) else None,
+    }
+    for name in INTEGER_COLUMNS:
+        track[name] = encode_column(columns[name])
+    for name, scale in FLOAT_COLUMNS.items():
+        track[name] = encode_column(columns[name], scale)
+    return track
+
+
+archived_tracks = sa.table(
+    'archived_tracks',
+    sa.column('session_id'), sa.column('encoding'), sa.column('point_count'),
+    sa.column('start_time'), sa.column('end_time'), sa.column('archived_at'),
+    *(sa.column(name) for name in ARRAY_COLUMNS),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'archived_tracks',
+        sa.Column('session_id', sa.Integer(), sa.ForeignKey('sessions.session_id'), primary_key=True),
+        sa.Column('encoding', sa.SmallInteger(), nullable=False),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime()),
+        sa.Column('end_time', sa.DateTime()),
+        *(sa.Column(name, sa.LargeBinary(), nullable=False) for name in ARRAY_COLUMNS),
+        sa.Column('archived_at', sa.DateTime()),
+    )
+    for name in ARRAY_COLUMNS:
+        # Already compressed: skip TOAST's own compression attempt
+        op.execute(f'ALTER TABLE archived_tracks ALTER COLUMN {name} SET STORAGE EXTERNAL')
+
+    conn = op.get_bind()
+    orphans = conn.execute(sa.text('SELECT count(*) FROM archived_coordinates WHERE session_id IS NULL')).scalar()
+    if orphans:
+        raise RuntimeError(
+            f'{orphans} archived_coordinates rows have no session_id and cannot be compacted; '
+            'assign or delete them first'
+        )
+
+    # One ordered pass over the table (there is no session_id index to look sessions up by)
+    rows = conn.execution_options(stream_results=True, yield_per=10000).execute(
+        sa.text(
+            """
+            SELECT session_id, archived_at, coord_id, timestamp,
+                   ST_Y(location::geometry), ST_X(location::geometry),
+                   speed, altitude, bearing, accuracy
+            FROM archived_coordinates
+            ORDER BY session_id
+            """
+        )
+    )
+    for session_id, points in itertools.groupby(rows, key=lambda row: row[0]):
+        points = list(points)
+        archived_at = max((point[1] for point in points if point[1] is not None), default=None)
+        conn.execute(
+            sa.insert(archived_tracks).values(
+                archived_at=archived_at,
+                **track_from_rows(session_id, (point[2:] for point in points)),
+            )
+        )
+
+    op.drop_index('idx_archived_coordinates_location', table_name='archived_coordinates')
+    op.drop_table('archived_coordinates')
+
+
+def downgrade() -> None:
+    op.create_table(
+        'archived_coordinates',
+        sa.Column('coord_id', sa.Integer(), primary_key=True),
+        sa.Column('session_id', sa.Integer(), sa.ForeignKey('sessions.session_id')),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column(
+            'location',
+            geoalchemy2.Geography(geometry_type='POINT', srid=4326, spatial_index=False),
+        ),
+        sa.Column('speed', sa.Float()),
+        sa.Column('altitude', sa.Float()),
+        sa.Column('bearing', sa.Float()),
+        sa.Column('accuracy', sa.Float()),
+        sa.Column('archived_at', sa.DateTime()),
+    )
+
+    conn = op.get_bind()
+    insert = sa.text(
+        """
+        INSERT INTO archived_coordinates
+            (coord_id, session_id, timestamp, location, speed, altitude, bearing, accuracy, archived_at)
+        VALUES
+            (:coord_id, :session_id, :timestamp,
+             CASE WHEN :latitude IS NULL OR :longitude IS NULL THEN NULL
+                  ELSE ST_SetSRID(ST_MakePoint(:longitude, :latitude), 4326)::geography END,
+             :speed, :altitude, :bearing, :accuracy, :archived_at)
+        """
+    )
+    tracks = conn.execute(sa.select(archived_tracks)).all()
+    for track in tracks:
+        if track.encoding != ENCODING:
+            raise RuntimeError(
+                f'archived track of session {track.session_id} uses encoding {track.encoding}; '
+                f'downgrade the data to encoding {ENCODING} first'
+            )
+        columns = {name: decode_column(getattr(track, name), as_float=False) for name in INTEGER_COLUMNS}
+        columns['timestamps'] = columns['timestamps'].astype('datetime64[us]').astype(object)
+        for name in FLOAT_COLUMNS:
+            floats = decode_column(getattr(track, name))
+            values = floats.astype(object)
+            values[np.isnan(floats)] = None
+            columns[name] = values
+        points = [
+            {
+                'coord_id': int(coord_id), 'session_id': track.session_id, 'timestamp': timestamp,
+                'latitude': latitude, 'longitude': longitude, 'speed': speed, 'altitude': altitude,
+                'bearing': bearing, 'accuracy': accuracy, 'archived_at': track.archived_at,
+            }
+            for coord_id, timestamp, latitude, longitude, speed, altitude, bearing, accuracy in zip(
+                *(columns[name] for name in ARRAY_COLUMNS)
+            )
+        ]
+        if points:
+            conn.execute(insert, points)
+
+    op.create_index(
+        'idx_archived_coordinates_location', 'archived_coordinates', ['location'], postgresql_using='gist'
+    )
+    op.drop_table('archived_tracks')
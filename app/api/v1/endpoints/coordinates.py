@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
 from .... import schemas, models
-from ....db import get_db
-from geoalchemy2 import functions as geo_func
+from ....db import get_db, get_read_db
+from ....services.cache_service import response_cache, session_coordinates_tag
+from ....services.event_service import publish_coordinate_event
 from sqlalchemy import func
-from shapely.geometry import Point
-from geoalchemy2.shape import from_shape
 
 router = APIRouter()
 
+
+def _point(longitude: float, latitude: float) -> str:
+    # EWKT is parsed by PostGIS; no shapely geometry needed per point
+    return f"SRID=4326;POINT({longitude} {latitude})"
+
+
+coordinate_list = TypeAdapter(List[schemas.CoordinateResponse])
+
 @router.post("/", response_model=schemas.CoordinateResponse)
 async def create_coordinate(
     coordinate: schemas.CoordinateCreate,
@@ -27,15 +35,14 @@ async def create_coordinate(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Active session not found"
         )
+    # Read before commit expires the instance
+    driver_id = session.driver_id
 
-    # Create Point geometry from latitude and longitude
-    point = Point(coordinate.longitude, coordinate.latitude)
-    
     # Create coordinate record
     db_coordinate = models.Coordinate(
         session_id=coordinate.session_id,
         timestamp=datetime.utcnow(),
-        location=from_shape(point, srid=4326),
+        location=_point(coordinate.longitude, coordinate.latitude),
         speed=coordinate.speed,
         altitude=coordinate.altitude,
         bearing=coordinate.bearing,
@@ -45,10 +52,11 @@ async def create_coordinate(
     try:
         db.add(db_coordinate)
         db.commit()
+        response_cache.invalidate(session_coordinates_tag(coordinate.session_id))
         db.refresh(db_coordinate)
         
         # Convert for response
-        return {
+        response_coordinate = {
             "coord_id": db_coordinate.coord_id,
             "session_id": db_coordinate.session_id,
             "timestamp": db_coordinate.timestamp,
@@ -59,6 +67,8 @@ async def create_coordinate(
             "bearing": db_coordinate.bearing,
             "accuracy": db_coordinate.accuracy
         }
+        publish_coordinate_event(response_coordinate, driver_id)
+        return response_coordinate
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -68,11 +78,28 @@ async def create_coordinate(
 
 @router.get("/session/{session_id}", response_model=List[schemas.CoordinateResponse])
 async def get_session_coordinates(
+    request: Request,
     session_id: int,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    """Track of a session, served from the response cache when possible.
+
+    Once the session is completed its track can no longer change, so the
+    response is cached without expiry and marked immutable for clients.
+    """
+    key = response_cache.key_for(request)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached.to_response(request)
+    generation = response_cache.generation
+
+    # Read first: a track seen after the session completed is final
+    session_status = db.query(models.Session.status).filter(
+        models.Session.session_id == session_id
+    ).scalar()
+
     # Query with ST_AsText to get WKT representation
     coordinates = db.query(
         models.Coordinate.coord_id,
@@ -108,7 +135,52 @@ async def get_session_coordinates(
                 "accuracy": coord.accuracy
             })
     
-    return result
+    return response_cache.put(
+        key,
+        coordinate_list.dump_json(coordinate_list.validate_python(result)),
+        tags=[session_coordinates_tag(session_id)],
+        immutable=session_status == "completed",
+        generation=generation,
+    ).to_response(request)
+
+
+@router.get("/archive/session/{session_id}", response_model=List[schemas.CoordinateResponse])
+async def get_archived_session_coordinates(
+    request: Request,
+    session_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_read_db)
+):
+    """Track of an archived session, in the same shape as the live endpoint.
+
+    The whole track is one row; pages are sliced out after decoding.
+    """
+    key = response_cache.key_for(request)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached.to_response(request)
+    generation = response_cache.generation
+
+    # NumPy-backed decoder; imported on first use to keep it off the startup path
+    from ....services.archive_service import track_coordinates
+
+    track = db.get(models.ArchivedTrack, session_id)
+    if track is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archived session not found"
+        )
+
+    result = track_coordinates(track, skip, limit)
+    # Archived tracks are never modified
+    return response_cache.put(
+        key,
+        coordinate_list.dump_json(coordinate_list.validate_python(result)),
+        tags=[session_coordinates_tag(session_id)],
+        immutable=True,
+        generation=generation,
+    ).to_response(request)
 
 
 @router.post("/batch", response_model=List[schemas.CoordinateResponse])
@@ -143,15 +215,16 @@ async def create_coordinates_batch(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Active session not found"
         )
+    # Read before commit expires the instance
+    driver_id = session.driver_id
 
     response_coordinates = []
     try:
         for coordinate in coordinates:
-            point = Point(coordinate.longitude, coordinate.latitude)
             db_coordinate = models.Coordinate(
                 session_id=session_id,
                 timestamp=datetime.utcnow(),
-                location=from_shape(point, srid=4326),
+                location=_point(coordinate.longitude, coordinate.latitude),
                 speed=coordinate.speed,
                 altitude=coordinate.altitude,
                 bearing=coordinate.bearing,
@@ -174,6 +247,9 @@ async def create_coordinates_batch(
             })
         
         db.commit()
+        response_cache.invalidate(session_coordinates_tag(session_id))
+        for response_coordinate in response_coordinates:
+            publish_coordinate_event(response_coordinate, driver_id)
         return response_coordinates
         
     except Exception as e:
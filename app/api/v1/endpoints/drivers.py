@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
 from .... import schemas
 from .... import models
-from ....db import get_db
+from ....db import get_db, get_read_db
+from ....services.audit_service import record_change
+from ....services.cache_service import DRIVERS_TAG, response_cache
+from ....services.driver_service import driver_counts, driver_page_json, estimate_driver_count
 from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Dict  # Add List here
@@ -11,20 +16,21 @@ import re
 
 router = APIRouter()
 
+DUPLICATE_MESSAGES = {
+    "uq_drivers_phone": "Driver with this phone number already exists",
+    "uq_drivers_plate_number": "Driver with this plate number already exists",
+}
+
+
+def _duplicate_detail(e: IntegrityError) -> Optional[str]:
+    # Uniqueness is enforced by the indexes, so concurrent registrations can't both win
+    constraint = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+    return DUPLICATE_MESSAGES.get(constraint)
+
+
 @router.post("/", response_model=schemas.DriverResponse, status_code=status.HTTP_201_CREATED)
 def create_driver(driver: schemas.DriverCreate, db: Session = Depends(get_db)):
     try:
-        # Check if driver with same phone number exists
-        existing_driver = db.query(models.Driver).filter(
-            models.Driver.contact_info['phone'].astext == driver.contact_info.phone
-        ).first()
-        
-        if existing_driver:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Driver with this phone number already exists"
-            )
-        
         # Convert Pydantic models to dictionaries
         contact_info_dict = driver.contact_info.model_dump()
         vehicle_details_dict = driver.vehicle_details.model_dump()
@@ -39,10 +45,18 @@ def create_driver(driver: schemas.DriverCreate, db: Session = Depends(get_db)):
         )
         db.add(db_driver)
         db.commit()
+        driver_counts.invalidate()
+        response_cache.invalidate(DRIVERS_TAG)
         db.refresh(db_driver)
         
         return db_driver
 
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=_duplicate_detail(e) or str(e)
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -52,61 +66,135 @@ def create_driver(driver: schemas.DriverCreate, db: Session = Depends(get_db)):
 
 
 
+def _driver_to_dict(driver: models.Driver) -> Dict:
+    """Convert a Driver row to a Pydantic-compatible dict, filling fields older rows may lack."""
+    # Ensure contact_info has all required fields
+    contact_info = driver.contact_info or {}
+    contact_info = {
+        "phone": contact_info.get("phone", ""),
+        "email": contact_info.get("email", "user@example.com"),
+        "address": contact_info.get("address", "Address not provided"),
+        "emergency_contact": contact_info.get("emergency_contact")
+    }
+
+    # Ensure vehicle_details has all required fields
+    vehicle_details = driver.vehicle_details or {}
+    vehicle_details = {
+        "type": vehicle_details.get("type", ""),
+        "make": vehicle_details.get("make", ""),
+        "model": vehicle_details.get("model", ""),
+        "year": vehicle_details.get("year", 2000),
+        "plate_number": vehicle_details.get("plate_number", "") or vehicle_details.get("plate", ""),
+        "color": vehicle_details.get("color")
+    }
+
+    return {
+        "driver_id": driver.driver_id,
+        "name": driver.name,
+        "contact_info": contact_info,
+        "vehicle_details": vehicle_details,
+        "status": driver.status,
+        "registration_date": driver.registration_date
+    }
+
+
+def _like_prefix(term: str) -> str:
+    # Backslash is PostgreSQL's default LIKE escape character
+    return re.sub(r"([\\%_])", r"\\\1", term) + "%"
+
+
+class DriverSearchField(str, Enum):
+    NAME = 'name'
+    PHONE = 'phone'
+    PLATE = 'plate'
+
+
+@router.get("/search", response_model=List[schemas.DriverResponse])
+def search_drivers(
+    q: str = Query(..., min_length=2, max_length=100),
+    field: Optional[DriverSearchField] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Prefix lookup by phone or plate number, fuzzy (trigram) lookup by name.
+
+    Without `field`, phone-like queries search phones; anything else
+    searches names and plate numbers.
+    """
+    term = q.strip()
+    if field is None and re.fullmatch(r"\+?\d+", term):
+        field = DriverSearchField.PHONE
+
+    query = db.query(models.Driver)
+    if field == DriverSearchField.PHONE:
+        # Stored numbers may or may not carry the leading "+"
+        digits = term.lstrip("+")
+        query = query.filter(or_(
+            models.Driver.phone.like(_like_prefix(digits)),
+            models.Driver.phone.like(_like_prefix("+" + digits))
+        )).order_by(models.Driver.phone)
+    elif field == DriverSearchField.PLATE:
+        query = query.filter(
+            models.Driver.plate_number.like(_like_prefix(term))
+        ).order_by(models.Driver.plate_number)
+    elif field == DriverSearchField.NAME:
+        # `%` is the trigram similarity match, `<->` its distance; both use idx_drivers_name_trgm
+        query = query.filter(or_(
+            models.Driver.name.op("%")(term),
+            models.Driver.name.ilike(_like_prefix(term))
+        )).order_by(models.Driver.name.op("<->")(term))
+    else:
+        query = query.filter(or_(
+            models.Driver.name.op("%")(term),
+            models.Driver.name.ilike(_like_prefix(term)),
+            models.Driver.plate_number.like(_like_prefix(term))
+        )).order_by(func.similarity(models.Driver.name, term).desc())
+
+    return [_driver_to_dict(driver) for driver in query.limit(limit).all()]
+
+
+class CountMode(str, Enum):
+    EXACT = 'exact'
+    ESTIMATED = 'estimated'
+
+
 @router.get("/", response_model=schemas.PaginatedDriverResponse)
 def get_drivers(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
-    status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    driver_status: Optional[str] = Query(None, alias="status"),
+    count: CountMode = CountMode.EXACT,
+    db: Session = Depends(get_read_db)
 ):
+    """Page of drivers.
+
+    `count=estimated` takes the total from planner statistics instead of
+    counting rows; exact totals are cached until the next driver write.
+    Items are built and serialized by Postgres and returned as-is, so the
+    response model here only documents the shape.
+    """
+    key = response_cache.key_for(request)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached.to_response(request)
+    generation = response_cache.generation
+
     try:
-        query = db.query(models.Driver)
-        
-        if status:
-            query = query.filter(models.Driver.status == status)
-        
-        total = query.count()
-        drivers = query.offset(skip).limit(limit).all()
-        
-        # Convert SQLAlchemy models to valid Pydantic-compatible dictionaries
-        driver_list = []
-        for driver in drivers:
-            # Ensure contact_info has all required fields
-            contact_info = driver.contact_info or {}
-            contact_info = {
-                "phone": contact_info.get("phone", ""),
-                "email": contact_info.get("email", "user@example.com"),
-                "address": contact_info.get("address", "Address not provided"),
-                "emergency_contact": contact_info.get("emergency_contact")
-            }
-
-            # Ensure vehicle_details has all required fields
-            vehicle_details = driver.vehicle_details or {}
-            vehicle_details = {
-                "type": vehicle_details.get("type", ""),
-                "make": vehicle_details.get("make", ""),
-                "model": vehicle_details.get("model", ""),
-                "year": vehicle_details.get("year", 2000),
-                "plate_number": vehicle_details.get("plate_number", "") or vehicle_details.get("plate", ""),
-                "color": vehicle_details.get("color")
-            }
-
-            driver_dict = {
-                "driver_id": driver.driver_id,
-                "name": driver.name,
-                "contact_info": contact_info,
-                "vehicle_details": vehicle_details,
-                "status": driver.status,
-                "registration_date": driver.registration_date
-            }
-            driver_list.append(driver_dict)
-
-        return {
-            "total": total,
-            "items": driver_list,
-            "page": (skip // limit) + 1,
-            "pages": (total + limit - 1) // limit
-        }
+        if count == CountMode.ESTIMATED:
+            total = estimate_driver_count(db, driver_status)
+        else:
+            total = driver_counts.get(db, driver_status)
+        items = driver_page_json(db, driver_status, skip, limit)
+
+        body = (
+            f'{{"total":{total},"items":{items},"page":{(skip // limit) + 1},'
+            f'"pages":{(total + limit - 1) // limit},'
+            f'"total_is_estimate":{"true" if count == CountMode.ESTIMATED else "false"}}}'
+        )
+        return response_cache.put(
+            key, body.encode(), tags=[DRIVERS_TAG], immutable=False, generation=generation
+        ).to_response(request)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -127,27 +215,25 @@ def update_driver(
                 detail=f"Driver with ID {driver_id} not found"
             )
         
-        # Check if updating phone number to one that already exists
-        if driver_update.contact_info.phone != db_driver.contact_info['phone']:
-            existing_driver = db.query(models.Driver).filter(
-                models.Driver.contact_info['phone'].astext == driver_update.contact_info.phone,
-                models.Driver.driver_id != driver_id
-            ).first()
-            if existing_driver:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Phone number already registered with another driver"
-                )
-
         # Update fields
         db_driver.name = driver_update.name
         db_driver.contact_info = driver_update.contact_info.model_dump()
         db_driver.vehicle_details = driver_update.vehicle_details.model_dump()
         
         db.commit()
+        response_cache.invalidate(DRIVERS_TAG)
         db.refresh(db_driver)
         return db_driver
 
+    except IntegrityError as e:
+        db.rollback()
+        detail = _duplicate_detail(e)
+        if detail == DUPLICATE_MESSAGES["uq_drivers_phone"]:
+            detail = "Phone number already registered with another driver"
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail or str(e)
+        )
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -161,34 +247,68 @@ class DriverStatus(str, Enum):
     INACTIVE = 'inactive'
     SUSPENDED = 'suspended'
 
+def _set_status(driver_id: int, new_status: str, *returning):
+    """UPDATE drivers ... FROM (SELECT ... FOR UPDATE) old RETURNING ..., old.status.
+
+    One statement that also returns the status it replaced, for the audit
+    log; the row lock keeps a concurrent change from slipping in between.
+    """
+    old = (
+        select(models.Driver.driver_id, models.Driver.status)
+        .where(models.Driver.driver_id == driver_id)
+        .with_for_update()
+        .subquery("old")
+    )
+    return (
+        update(models.Driver)
+        .where(models.Driver.driver_id == old.c.driver_id)
+        .values(status=new_status)
+        .returning(*returning, old.c.status.label("old_status"))
+        .execution_options(synchronize_session=False)
+    )
+
+
 @router.patch("/{driver_id}/status", response_model=schemas.DriverResponse)
 def update_driver_status(
     driver_id: int,
-    status: DriverStatus,
+    driver_status: DriverStatus = Query(..., alias="status"),
     db: Session = Depends(get_db)
 ):
-    db_driver = db.query(models.Driver).filter(models.Driver.driver_id == driver_id).first()
-    if not db_driver:
+    # Single UPDATE ... RETURNING instead of select, modify, commit, refresh
+    row = db.execute(_set_status(driver_id, driver_status.value, models.Driver)).first()
+    if row is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Driver with ID {driver_id} not found"
         )
-    
-    db_driver.status = status
+    db_driver = row[0]
+
+    record_change(db, "driver", driver_id, "update", {
+        "status": {"old": row.old_status, "new": driver_status.value}
+    })
+    # Detach so commit doesn't expire it and trigger a reload for the response
+    db.expunge(db_driver)
     db.commit()
-    db.refresh(db_driver)
+    driver_counts.invalidate()
+    response_cache.invalidate(DRIVERS_TAG)
     return db_driver
 
 @router.delete("/{driver_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_driver(driver_id: int, db: Session = Depends(get_db)):
-    db_driver = db.query(models.Driver).filter(models.Driver.driver_id == driver_id).first()
-    if not db_driver:
+    # Soft delete - just update status to 'inactive'
+    deactivated = db.execute(_set_status(driver_id, "inactive", models.Driver.driver_id)).first()
+    if deactivated is None:
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Driver with ID {driver_id} not found"
         )
     
-    # Soft delete - just update status to 'inactive'
-    db_driver.status = 'inactive'
+    record_change(db, "driver", driver_id, "delete", {
+        "status": {"old": deactivated.old_status, "new": "inactive"}
+    })
     db.commit()
+    driver_counts.invalidate()
+    response_cache.invalidate(DRIVERS_TAG)
     return {"message": f"Driver {driver_id} has been deactivated"}
\ No newline at end of file
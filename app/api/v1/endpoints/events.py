@@ -0,0 +1,92 @@
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import json
+from ....core.config import settings
+from ....services.event_service import broker, EventFilter
+
+router = APIRouter()
+
+
+def _event_filter(
+    driver_id: Optional[List[int]],
+    bbox: Optional[str],
+    type: Optional[List[str]],
+) -> EventFilter:
+    return EventFilter.from_params(
+        driver_ids=driver_id,
+        bbox=bbox,
+        event_types=type,
+    )
+
+
+def _serialize(event) -> dict:
+    return {"id": event.id, "type": event.type, "data": jsonable_encoder(event.data)}
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    driver_id: Optional[List[int]] = Query(None),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    type: Optional[List[str]] = Query(None),
+):
+    """Server-Sent Events stream of session and coordinate events."""
+    try:
+        event_filter = _event_filter(driver_id, bbox, type)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    subscription = broker.subscribe(event_filter)
+
+    async def event_source():
+        try:
+            while not await request.is_disconnected():
+                batch = await subscription.next_batch(timeout=settings.EVENT_KEEPALIVE_SECONDS)
+                if not batch:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                chunks = []
+                for event in batch:
+                    data = json.dumps(jsonable_encoder(event.data))
+                    chunks.append(f"id: {event.id}\nevent: {event.type}\ndata: {data}\n\n")
+                yield "".join(chunks)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(
+    websocket: WebSocket,
+    driver_id: Optional[List[int]] = Query(None),
+    bbox: Optional[str] = Query(None),
+    type: Optional[List[str]] = Query(None),
+):
+    """WebSocket stream of session and coordinate events, sent as JSON arrays per batch."""
+    try:
+        event_filter = _event_filter(driver_id, bbox, type)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    subscription = broker.subscribe(event_filter)
+    try:
+        while True:
+            batch = await subscription.next_batch(timeout=settings.EVENT_KEEPALIVE_SECONDS)
+            await websocket.send_json([_serialize(event) for event in batch])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(subscription)
@@ -1,46 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import exists, literal, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from .... import schemas, models
-from ....db import get_db
+from ....db import get_db, get_read_db
+from ....services.audit_service import record_change
+from ....services.cache_service import driver_sessions_tag, response_cache, session_coordinates_tag
+from ....services.event_service import publish_session_event
 from datetime import datetime
 
 router = APIRouter()
 
+session_list = TypeAdapter(List[schemas.SessionResponse])
+
+def _start_session_statement(driver_id: int, now: datetime):
+    """Insert an active session unless the driver already has one; return either way.
+
+    uq_sessions_driver_active makes ON CONFLICT the arbiter, so concurrent
+    starts for the same driver can never create two active sessions.
+    """
+    # Selecting from drivers doubles as the existence check: no driver, no row to insert
+    new_session = select(
+        models.Driver.driver_id, literal(now), literal("active"), literal(now)
+    ).where(models.Driver.driver_id == driver_id)
+    inserted = (
+        pg_insert(models.Session)
+        .from_select(["driver_id", "start_time", "status", "created_at"], new_session)
+        .on_conflict_do_nothing(index_elements=["driver_id"], index_where=text("status = 'active'"))
+        .returning(*models.Session.__table__.c, literal(True).label("created"))
+        .cte("inserted")
+    )
+    existing = (
+        select(*models.Session.__table__.c, literal(False).label("created"))
+        .where(
+            models.Session.driver_id == driver_id,
+            models.Session.status == "active",
+            ~exists(select(inserted.c.session_id))
+        )
+    )
+    return select(inserted).union_all(existing)
+
+
 @router.post("/start", response_model=schemas.SessionResponse)
 async def start_session(
     session: schemas.SessionCreate,
     db: Session = Depends(get_db)
 ):
-    # Check if driver exists
-    driver = db.query(models.Driver).filter(models.Driver.driver_id == session.driver_id).first()
-    if not driver:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Driver with id {session.driver_id} not found"
-        )
-    
-    # Check if driver already has an active session
-    active_session = db.query(models.Session).filter(
-        models.Session.driver_id == session.driver_id,
-        models.Session.status == "active"
-    ).first()
-    
-    if active_session:
-        return active_session
-
-    # Create new session with server time
-    db_session = models.Session(
-        driver_id=session.driver_id,
-        start_time=datetime.utcnow(),  # Use server time
-        status="active"
-    )
-    
+    statement = _start_session_statement(session.driver_id, datetime.utcnow())  # Use server time
     try:
-        db.add(db_session)
+        row = db.execute(statement).first()
+        if row is None:
+            # A concurrent start committed after our snapshot was taken: the insert
+            # conflicted but the row was invisible. A fresh statement sees it.
+            db.rollback()
+            row = db.execute(statement).first()
+        # Still no row: no such driver, or its active session changed under us again
+        driver_found = row is not None or db.execute(
+            select(exists().where(models.Driver.driver_id == session.driver_id))
+        ).scalar()
+        if row is not None and row.created:
+            record_change(db, "session", row.session_id, "create", {
+                "driver_id": {"new": row.driver_id},
+                "start_time": {"new": row.start_time},
+                "status": {"new": row.status},
+            })
         db.commit()
-        db.refresh(db_session)
-        return db_session
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -48,33 +74,49 @@ async def start_session(
             detail=str(e)
         )
 
+    if not driver_found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Driver with id {session.driver_id} not found"
+        )
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Sessions of driver {session.driver_id} changed concurrently, retry the request"
+        )
+    if row.created:
+        response_cache.invalidate(driver_sessions_tag(row.driver_id))
+        publish_session_event("session.started", row)
+    return row._mapping
+
 @router.post("/{session_id}/end", response_model=schemas.SessionResponse)
 async def end_session(
     session_id: int,
     session_update: schemas.SessionUpdate,
     db: Session = Depends(get_db)
 ):
-    # Get active session
-    db_session = db.query(models.Session).filter(
-        models.Session.session_id == session_id,
-        models.Session.status == "active"
-    ).first()
-    
-    if not db_session:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Active session with id {session_id} not found"
+    statement = (
+        update(models.Session)
+        .where(
+            models.Session.session_id == session_id,
+            models.Session.status == "active"
         )
-
-    # Update session with server time
-    db_session.end_time = datetime.utcnow()  # Use server time
-    db_session.total_distance_km = session_update.total_distance_km
-    db_session.status = "completed"
-    
+        .values(
+            end_time=datetime.utcnow(),  # Use server time
+            total_distance_km=session_update.total_distance_km,
+            status="completed"
+        )
+        .returning(*models.Session.__table__.c)
+    )
     try:
+        row = db.execute(statement).first()
+        if row is not None:
+            record_change(db, "session", session_id, "update", {
+                "end_time": {"new": row.end_time},
+                "total_distance_km": {"new": row.total_distance_km},
+                "status": {"old": "active", "new": row.status},
+            })
         db.commit()
-        db.refresh(db_session)
-        return db_session
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -82,25 +124,42 @@ async def end_session(
             detail=str(e)
         )
 
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Active session with id {session_id} not found"
+        )
+    response_cache.invalidate(driver_sessions_tag(row.driver_id), session_coordinates_tag(session_id))
+    publish_session_event("session.ended", row)
+    return row._mapping
+
 @router.get("/driver/{driver_id}", response_model=List[schemas.SessionResponse])
 async def get_driver_sessions(
+    request: Request,
     driver_id: int,
-    status: Optional[str] = None,  # Optional status filter
+    driver_status: Optional[str] = Query(None, alias="status"),  # Optional status filter
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    key = response_cache.key_for(request)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached.to_response(request)
+    generation = response_cache.generation
+
+    if driver_status and driver_status not in ["active", "completed"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Status must be either 'active' or 'completed'"
+        )
+
     # Build query
     query = db.query(models.Session).filter(models.Session.driver_id == driver_id)
     
     # Apply status filter if provided
-    if status:
-        if status not in ["active", "completed"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Status must be either 'active' or 'completed'"
-            )
-        query = query.filter(models.Session.status == status)
+    if driver_status:
+        query = query.filter(models.Session.status == driver_status)
     
     # Get results
     sessions = query.order_by(models.Session.start_time.desc())\
@@ -108,4 +167,11 @@ async def get_driver_sessions(
         .limit(limit)\
         .all()
     
-    return sessions
\ No newline at end of file
+    # New and ending sessions change this list, so it is never immutable
+    return response_cache.put(
+        key,
+        session_list.dump_json(session_list.validate_python(sessions)),
+        tags=[driver_sessions_tag(driver_id)],
+        immutable=False,
+        generation=generation,
+    ).to_response(request)
\ No newline at end of file
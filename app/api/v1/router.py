@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from .endpoints import drivers, sessions, coordinates
+from .endpoints import drivers, sessions, coordinates, events
 
 api_router = APIRouter()
 api_router.include_router(drivers.router, prefix="/drivers", tags=["drivers"])
 api_router.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
-api_router.include_router(coordinates.router, prefix="/coordinates", tags=["coordinates"])
\ No newline at end of file
+api_router.include_router(coordinates.router, prefix="/coordinates", tags=["coordinates"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
\ No newline at end of file
@@ -1,9 +1,6 @@
 from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
-
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Transit Advertising API"
     VERSION: str = "1.0.0"
@@ -14,8 +11,89 @@ class Settings(BaseSettings):
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER")
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "6543")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "postgres")
+    POSTGRES_SSLMODE: str = os.getenv("POSTGRES_SSLMODE", "require")
+    # "psycopg2" or "psycopg" (v3)
+    POSTGRES_DRIVER: str = os.getenv("POSTGRES_DRIVER", "psycopg2")
+    # "transaction" for a transaction-mode pooler (Supabase/PgBouncer on 6543),
+    # "session" for a session-mode pooler or a direct connection
+    POSTGRES_POOLER_MODE: str = os.getenv("POSTGRES_POOLER_MODE", "transaction")
+
+    # Client-side connection pool
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # Optional read replica; unset server means reads go to the primary
+    POSTGRES_REPLICA_SERVER: str = os.getenv("POSTGRES_REPLICA_SERVER", "")
+    # Empty means the primary's POSTGRES_PORT
+    POSTGRES_REPLICA_PORT: str = os.getenv("POSTGRES_REPLICA_PORT", "")
+    DB_REPLICA_POOL_SIZE: int = int(os.getenv("DB_REPLICA_POOL_SIZE", "5"))
+    DB_REPLICA_MAX_OVERFLOW: int = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", "10"))
+    # Reads fall back to the primary while replica lag exceeds this budget
+    REPLICA_MAX_STALENESS_SECONDS: float = float(os.getenv("REPLICA_MAX_STALENESS_SECONDS", "5"))
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "2"))
+
+    # Application log files (created at startup, not on import)
+    LOG_DIR: str = os.getenv("LOG_DIR", "logs")
+
+    # Startup warm-up: pooled connections opened and caches filled before serving
+    STARTUP_WARMUP_ENABLED: bool = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+    DB_POOL_WARMUP_CONNECTIONS: int = int(os.getenv("DB_POOL_WARMUP_CONNECTIONS", "2"))
+
+    # SQL statement logging; very expensive, keep off outside local debugging
+    SQL_ECHO: bool = os.getenv("SQL_ECHO", "false").lower() == "true"
+
+    # Instrumentation
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+    SLOW_QUERY_SAMPLE_RATE: float = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+
+    # On-demand per-request profiling; requests opt in with PROFILING_TOKEN
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_TOKEN: str = os.getenv("PROFILING_TOKEN", "")
+    PROFILING_INTERVAL_MS: float = float(os.getenv("PROFILING_INTERVAL_MS", "2"))
+    PROFILING_OUTPUT_DIR: str = os.getenv("PROFILING_OUTPUT_DIR", "profiles")
+    # Older profiles are deleted once the directory holds more than this
+    PROFILING_MAX_FILES: int = int(os.getenv("PROFILING_MAX_FILES", "200"))
+
+    # Driver listing totals are cached this long (and dropped on driver writes)
+    DRIVER_COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("DRIVER_COUNT_CACHE_TTL_SECONDS", "30"))
+
+    # Audit log: captured on commit, written in batches by a background thread
+    AUDIT_ENABLED: bool = os.getenv("AUDIT_ENABLED", "true").lower() == "true"
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "1"))
+    # "drop" or "block" when the queue is full
+    AUDIT_QUEUE_POLICY: str = os.getenv("AUDIT_QUEUE_POLICY", "drop")
+    AUDIT_BLOCK_TIMEOUT_SECONDS: float = float(os.getenv("AUDIT_BLOCK_TIMEOUT_SECONDS", "0.05"))
+
+    # HTTP response cache (per process, ETag revalidation)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    # Upper bound on staleness of mutable entries after writes handled by other workers
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "5"))
+
+    # POI footfall precompute
+    POI_FOOTFALL_REFRESH_SECONDS: float = float(os.getenv("POI_FOOTFALL_REFRESH_SECONDS", "300"))
+    # Every Nth refresh reloads all POIs instead of only the changed ones
+    POI_FOOTFALL_FULL_RELOAD_EVERY: int = int(os.getenv("POI_FOOTFALL_FULL_RELOAD_EVERY", "12"))
+
+    # Live event fan-out (SSE / WebSocket)
+    EVENT_SUBSCRIBER_BUFFER: int = int(os.getenv("EVENT_SUBSCRIBER_BUFFER", "256"))
+    EVENT_KEEPALIVE_SECONDS: float = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+    # Subscribers live in the worker they connected to. With more than one
+    # worker, set a Redis URL so events reach clients of every worker;
+    # unset, each client sees only the events its own worker ingested.
+    EVENT_REDIS_URL: str = os.getenv("EVENT_REDIS_URL", "")
+    EVENT_REDIS_CHANNEL: str = os.getenv("EVENT_REDIS_CHANNEL", "transit_api:events")
+    EVENT_RELAY_QUEUE_SIZE: int = int(os.getenv("EVENT_RELAY_QUEUE_SIZE", "10000"))
 
     class Config:
         case_sensitive = True
+        # Read by pydantic when Settings() is built; os.environ is left untouched
+        env_file = ".env"
+        extra = "ignore"
 
 settings = Settings()
\ No newline at end of file
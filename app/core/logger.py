@@ -2,30 +2,38 @@ import logging
 from logging.handlers import RotatingFileHandler
 import os
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
+from .config import settings
 
-# Configure logging
+# Handlers are attached by configure_logging() at startup, not on import
 logger = logging.getLogger("transit_api")
 logger.setLevel(logging.INFO)
 
-# Console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-
-# File handler
-file_handler = RotatingFileHandler(
-    "logs/transit_api.log",
-    maxBytes=10485760,  # 10MB
-    backupCount=5
-)
-file_handler.setLevel(logging.INFO)
-
-# Create formatters and add it to the handlers
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-# Add the handlers to the logger
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
\ No newline at end of file
+
+def configure_logging() -> None:
+    """Console and rotating file handlers; safe to call more than once."""
+    if logger.handlers:
+        return
+
+    # Create logs directory if it doesn't exist
+    os.makedirs(settings.LOG_DIR, exist_ok=True)
+
+    # Console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+
+    # File handler
+    file_handler = RotatingFileHandler(
+        os.path.join(settings.LOG_DIR, "transit_api.log"),
+        maxBytes=10485760,  # 10MB
+        backupCount=5
+    )
+    file_handler.setLevel(logging.INFO)
+
+    # Create formatters and add it to the handlers
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    file_handler.setFormatter(formatter)
+
+    # Add the handlers to the logger
+    logger.addHandler(console_handler)
+    logger.addHandler(file_handler)
@@ -0,0 +1,257 @@
+import os
+import random
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from starlette.routing import Match
+
+from .config import settings
+from .logger import logger
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Total time spent in SQL statements per HTTP request",
+    ["route"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Latency of individual SQL statements",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_SLOW_QUERIES = Counter(
+    "db_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_THRESHOLD_MS",
+    ["engine"],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connection pool usage",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+
+
+def metrics_registry():
+    """The registry /metrics should expose.
+
+    Under gunicorn (see gunicorn.conf.py) PROMETHEUS_MULTIPROC_DIR is set
+    before any worker imports prometheus_client: every worker writes its
+    samples there and a scrape aggregates all live workers, whichever one
+    answers it. Otherwise this process's default registry.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class RequestStats:
+    """SQL accounting for the request currently being served."""
+
+    __slots__ = ("scope", "queries", "db_time")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Threadpool endpoints run in a copy of the request context, so they see
+# (and mutate) the same RequestStats object as the middleware.
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection.
+
+    Use `instrumented_pool_class` to get one labelled for an engine.
+    """
+
+    metrics_label = "primary"
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.labels(self.metrics_label).observe(perf_counter() - start)
+
+
+def instrumented_pool_class(name: str) -> type:
+    """An InstrumentedQueuePool subclass labelled `name`.
+
+    The label is a class attribute because `engine.dispose()` replaces the
+    pool with `pool.recreate()`, a new instance of the same class.
+    """
+    return type(f"InstrumentedQueuePool_{name}", (InstrumentedQueuePool,), {"metrics_label": name})
+
+
+class _PoolUsage:
+    """Connection counts of one engine's pool, kept up to date from pool events.
+
+    Multiprocess mode cannot call back into a worker at scrape time, so
+    the gauges are set as connections come and go rather than read from
+    the pool.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.size = size
+        self.open = 0
+        self.checked_out = 0
+        self._lock = threading.Lock()
+        self._gauges = {
+            state: DB_POOL_CONNECTIONS.labels(name, state)
+            for state in ("size", "checked_out", "checked_in", "overflow")
+        }
+        self._gauges["size"].set(size)
+
+    def update(self, opened: int = 0, checked_out: int = 0) -> None:
+        with self._lock:
+            self.open = max(self.open + opened, 0)
+            self.checked_out = max(self.checked_out + checked_out, 0)
+            self._gauges["checked_out"].set(self.checked_out)
+            self._gauges["checked_in"].set(max(self.open - self.checked_out, 0))
+            self._gauges["overflow"].set(max(self.open - self.size, 0))
+
+    def reset(self) -> None:
+        # The engine's pool was replaced by an empty one
+        with self._lock:
+            self.open = 0
+            self.checked_out = 0
+        self.update()
+
+
+def instrument_engine(engine, name: str = "primary") -> None:
+    """Attach query timing, slow-query logging and pool gauges to an engine."""
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        usage = _PoolUsage(name, pool.size())
+        # Pool events registered on the engine are carried over to the pool
+        # `dispose()` creates, e.g. in a forked worker; counts restart there
+        event.listen(engine, "engine_disposed", lambda *args: usage.reset())
+        event.listen(engine, "connect", lambda *args: usage.update(opened=1))
+        event.listen(engine, "close", lambda *args: usage.update(opened=-1))
+        event.listen(engine, "detach", lambda *args: usage.update(opened=-1))
+        event.listen(engine, "checkout", lambda *args: usage.update(checked_out=1))
+        event.listen(engine, "checkin", lambda *args: usage.update(checked_out=-1))
+
+    query_duration = DB_QUERY_DURATION.labels(name)
+    slow_queries = DB_SLOW_QUERIES.labels(name)
+    slow_threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000.0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_start_time"].pop()
+        query_duration.observe(elapsed)
+
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+        if elapsed >= slow_threshold:
+            slow_queries.inc()
+            if random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+                path = stats.scope.get("path") if stats is not None else None
+                logger.warning(
+                    "Slow query (%.1f ms, engine=%s, path=%s): %s",
+                    elapsed * 1000, name, path, statement[:1000]
+                )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
+
+
+def _route_template(scope: dict) -> str:
+    # Route templates keep label cardinality bounded ("/drivers/{driver_id}", not "/drivers/42")
+    # FastAPI no longer copies included routes, so scope["route"].path is
+    # relative to its router ("/search"); the context it routed by carries
+    # the full template with every include_router prefix.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None and context.path_format:
+        return context.path_format
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        for candidate in getattr(scope["app"], "routes", []):
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path_format", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and per-request SQL usage."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            _request_stats.reset(token)
+
+            route = _route_template(scope)
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.db_time)
@@ -0,0 +1,233 @@
+import asyncio
+import hmac
+import json
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+from typing import Optional
+from urllib.parse import parse_qs, parse_qsl, urlencode
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .logger import logger
+
+PROFILE_HEADER = "x-profile-token"
+PROFILE_QUERY_PARAM = "profile_token"
+
+
+class RequestProfiler:
+    """Sampling profiler scoped to one request.
+
+    A background thread periodically walks the stacks of the threads
+    serving this request and keeps those currently executing the matched
+    endpoint. That is the event loop thread while this request's task is
+    the one running (async endpoints), and any thread that called
+    `register_thread` from inside the request context (sync endpoints in
+    the threadpool, registered by the SQL hooks from their first
+    statement on). Concurrent requests to the same endpoint are not
+    mixed in. Stacks are stored in collapsed ("folded") format, which
+    flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, scope: dict, interval: float):
+        self.scope = scope
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sql = []
+        self.started = perf_counter()
+        self.duration = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._loop_thread: Optional[int] = None
+        self._threads = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        # Async endpoints run in the task (and on the thread) that starts profiling
+        try:
+            self._task = asyncio.current_task()
+        except RuntimeError:
+            self._task = None
+        self._loop_thread = threading.get_ident() if self._task is not None else None
+        self.started = perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.duration = perf_counter() - self.started
+        self._stop.set()
+        self._thread.join()
+
+    def register_thread(self) -> None:
+        """Sample the calling thread too; call it from inside the request context."""
+        self._threads.add(threading.get_ident())
+
+    def _serving(self, thread_id: int) -> bool:
+        if thread_id == self._loop_thread:
+            # The loop interleaves every async request; only our task counts
+            return asyncio.current_task(self._task.get_loop()) is self._task
+        return thread_id in self._threads
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            # Set by the router once the request is matched
+            code = getattr(self.scope.get("endpoint"), "__code__", None)
+            if code is None:
+                continue
+            for thread_id, frame in sys._current_frames().items():
+                if not self._serving(thread_id):
+                    continue
+                stack = []
+                while frame is not None:
+                    frame_code = frame.f_code
+                    stack.append(f"{frame_code.co_name} ({frame_code.co_filename}:{frame.f_lineno})")
+                    if frame_code is code:
+                        self.samples[";".join(reversed(stack))] += 1
+                        break
+                    frame = frame.f_back
+
+    def record_query(self, statement: str, started: float, elapsed: float) -> None:
+        self.sql.append({
+            "offset_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+        })
+
+    def to_dict(self, profile_id: str) -> dict:
+        return {
+            "profile_id": profile_id,
+            "method": self.scope["method"],
+            "path": self.scope["path"],
+            "query_string": _without_token(self.scope.get("query_string", b"").decode("latin-1")),
+            "captured_at": datetime.utcnow().isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "sample_interval_ms": self.interval * 1000,
+            "folded_stacks": "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()),
+            "sql": self.sql,
+        }
+
+
+def _without_token(query_string: str) -> str:
+    # Stored profiles must not leak the profiling token
+    if PROFILE_QUERY_PARAM not in query_string:
+        return query_string
+    return urlencode([
+        (name, value) for name, value in parse_qsl(query_string, keep_blank_values=True)
+        if name != PROFILE_QUERY_PARAM
+    ])
+
+
+_active_profiler: ContextVar[Optional[RequestProfiler]] = ContextVar("active_profiler", default=None)
+
+
+def profile_engine(engine) -> None:
+    """Record a per-request SQL timeline for profiled requests."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profiler = _active_profiler.get()
+        if profiler is not None:
+            # Runs on the thread serving the request, sync endpoints included
+            profiler.register_thread()
+            conn.info.setdefault("profile_start_time", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profiler = _active_profiler.get()
+        if profiler is not None and conn.info.get("profile_start_time"):
+            started = conn.info["profile_start_time"].pop()
+            profiler.record_query(statement, started, perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("profile_start_time"):
+            conn.info["profile_start_time"].pop()
+
+
+def _profile_requested(scope: dict) -> bool:
+    expected = settings.PROFILING_TOKEN
+    if not expected:
+        return False
+    token = None
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER.encode():
+            token = value.decode("latin-1")
+            break
+    if token is None and scope.get("query_string"):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM)
+        token = values[0] if values else None
+    return token is not None and hmac.compare_digest(token, expected)
+
+
+def _store_profile(profile: dict) -> str:
+    os.makedirs(settings.PROFILING_OUTPUT_DIR, exist_ok=True)
+    path = os.path.join(settings.PROFILING_OUTPUT_DIR, f"{profile['profile_id']}.json")
+    with open(path, "w") as f:
+        json.dump(profile, f)
+    _prune_profiles(settings.PROFILING_OUTPUT_DIR, settings.PROFILING_MAX_FILES)
+    return path
+
+
+def _prune_profiles(directory: str, keep: int) -> None:
+    """Delete all but the `keep` newest profiles in `directory`."""
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".json"):
+            try:
+                profiles.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                # Pruned by another worker
+                continue
+    profiles.sort()
+    for _, path in profiles[:max(len(profiles) - keep, 0)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ProfilingMiddleware:
+    """Profile a single request when it carries a valid profiling token.
+
+    Only installed when PROFILING_ENABLED is set; unprofiled requests pay a
+    header lookup. The profile is written to PROFILING_OUTPUT_DIR, which
+    keeps the newest PROFILING_MAX_FILES, and its id returned in the
+    `X-Profile-Id` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = RequestProfiler(scope, settings.PROFILING_INTERVAL_MS / 1000.0)
+        token = _active_profiler.set(profiler)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            _active_profiler.reset(token)
+            path = await run_in_threadpool(_store_profile, profiler.to_dict(profile_id))
+            logger.info(
+                "Stored profile %s for %s %s (%.1f ms) at %s",
+                profile_id, scope["method"], scope["path"], profiler.duration * 1000, path
+            )
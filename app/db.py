@@ -1,36 +1,202 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from .core.config import settings
+from .core.logger import logger
+from .core.metrics import instrument_engine, instrumented_pool_class
+from .core.profiling import profile_engine
+import os
+import threading
+import time
 import urllib.parse
 
-# Encode password to handle special characters
-encoded_password = urllib.parse.quote_plus(settings.POSTGRES_PASSWORD)
 
-# Construct Database URL with encoded password
-DATABASE_URL = f"postgresql://{settings.POSTGRES_USER}:{encoded_password}@{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+def build_database_url(server: str, port: str) -> str:
+    # Encode password to handle special characters
+    encoded_password = urllib.parse.quote_plus(settings.POSTGRES_PASSWORD)
+    return (
+        f"postgresql+{settings.POSTGRES_DRIVER}://{settings.POSTGRES_USER}:{encoded_password}"
+        f"@{server}:{port}/{settings.POSTGRES_DB}"
+    )
 
-# Create engine with proper SSL and authentication settings for Supabase
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={
-        "sslmode": "require",
+
+def _connect_args() -> dict:
+    connect_args = {
+        "sslmode": settings.POSTGRES_SSLMODE,
         "application_name": "transit_api",
         # Explicitly set authentication method
         "client_encoding": "utf8",
         "gssencmode": "disable",  # Disable GSSAPI authentication
-    },
-    pool_size=5,
-    max_overflow=10,
-    echo=True  # This will log SQL statements, helpful for debugging
-)
+    }
+    if settings.POSTGRES_DRIVER == "psycopg" and settings.POSTGRES_POOLER_MODE == "transaction":
+        # Server-side prepared statements are bound to a backend connection, which a
+        # transaction-mode pooler swaps between transactions. psycopg2 never prepares.
+        connect_args["prepare_threshold"] = None
+    return connect_args
+
+
+def _create_engine(server: str, port: str, name: str, pool_size: int, max_overflow: int):
+    engine = create_engine(
+        build_database_url(server, port),
+        connect_args=_connect_args(),
+        poolclass=instrumented_pool_class(name),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        # The pooler closes idle server connections; recycle before it does
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # LIFO keeps a small set of connections hot so idle ones can be recycled
+        pool_use_lifo=True,
+        echo=settings.SQL_ECHO  # Logs every SQL statement; enable only for local debugging
+    )
+    instrument_engine(engine, name)
+    if settings.PROFILING_ENABLED:
+        profile_engine(engine)
+    return engine
+
+
+class ReplicaLagMonitor:
+    """Caches the replica's replication lag and decides whether reads may use it."""
+
+    # Zero when the replica has replayed everything it received, so an idle
+    # primary does not look like lag. NULL on a server that is not in recovery.
+    LAG_QUERY = text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    )
+
+    def __init__(self, engine, max_staleness: float, check_interval: float):
+        self.engine = engine
+        self.max_staleness = max_staleness
+        self.check_interval = check_interval
+        self.lag = None
+        self._usable = True
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def usable(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._usable
+        # One request refreshes the lag; the others use the cached answer
+        if not self._lock.acquire(blocking=False):
+            return self._usable
+        try:
+            self._usable = self._check()
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return self._usable
+
+    def _check(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                lag = conn.execute(self.LAG_QUERY).scalar()
+        except Exception as e:
+            logger.warning("Replica lag check failed, reading from primary: %s", e)
+            return False
+        self.lag = float(lag or 0)
+        if self.lag > self.max_staleness:
+            logger.warning(
+                "Replica lag %.1fs exceeds %.1fs budget, reading from primary",
+                self.lag, self.max_staleness
+            )
+            return False
+        return True
+
+
+# Bound to their engines by get_engine(); creating sessions needs no engine
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# Created on first use, in the process that uses them (see get_engine)
+engine = None
+read_engine = None
+replica_monitor = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """The primary engine, created on first call.
+
+    Importing the app builds no engine or pool, so gunicorn workers and
+    test runs don't inherit one from whoever imported it first.
+    """
+    global engine, read_engine, replica_monitor
+    if engine is not None:
+        return engine
+    with _engine_lock:
+        if engine is not None:
+            return engine
+        # Primary: all writes, and reads when no replica is configured or it is too far behind
+        primary = _create_engine(
+            settings.POSTGRES_SERVER, settings.POSTGRES_PORT, "primary",
+            settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW,
+        )
+        if settings.POSTGRES_REPLICA_SERVER:
+            read_engine = _create_engine(
+                settings.POSTGRES_REPLICA_SERVER, settings.POSTGRES_REPLICA_PORT or settings.POSTGRES_PORT,
+                "replica", settings.DB_REPLICA_POOL_SIZE, settings.DB_REPLICA_MAX_OVERFLOW,
+            )
+            replica_monitor = ReplicaLagMonitor(
+                read_engine,
+                settings.REPLICA_MAX_STALENESS_SECONDS,
+                settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+            )
+        else:
+            read_engine = primary
+        SessionLocal.configure(bind=primary)
+        ReadSessionLocal.configure(bind=read_engine)
+        # Published last: other threads only check this one
+        engine = primary
+    return engine
+
+
+def get_read_engine():
+    get_engine()
+    return read_engine
+
+
+def _after_fork_in_child() -> None:
+    # Pooled connections belong to the parent; the child opens its own
+    for created in {engine, read_engine} - {None}:
+        created.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def warm_pool(target, connections: int) -> None:
+    """Open `connections` pooled connections so first requests don't pay for connecting."""
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = target.connect()
+            opened.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in opened:
+            conn.close()
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Dependency to use in FastAPI
 def get_db():
+    get_engine()
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency for read-only endpoints: replica when fresh enough, primary otherwise
+def get_read_db():
+    get_engine()
+    if replica_monitor is not None and replica_monitor.usable():
+        db = ReadSessionLocal()
+    else:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
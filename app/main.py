@@ -1,20 +1,65 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import text  # Add this import
-from .db import get_db
+from .db import get_db, get_engine, get_read_engine, warm_pool, SessionLocal
 from .core.config import settings
+from .core.logger import configure_logging, logger
+from .core.metrics import MetricsMiddleware, metrics_registry
+from .core.profiling import ProfilingMiddleware
 from .api.v1.router import api_router
+from .services.audit_service import audit_writer
+from .services.driver_service import driver_counts
+from .services.event_service import event_relay
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    version=settings.VERSION,
-)
+router = APIRouter()
 
-@app.get("/")
+
+def warm_up() -> None:
+    """Connect the pools and fill the caches before this worker takes traffic."""
+    try:
+        engine = get_engine()
+        warm_pool(engine, min(settings.DB_POOL_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE))
+        read_engine = get_read_engine()
+        if read_engine is not engine:
+            warm_pool(read_engine, min(settings.DB_POOL_WARMUP_CONNECTIONS, settings.DB_REPLICA_POOL_SIZE))
+
+        # NumPy-backed; imported here to keep it off the import path
+        from .services.poi_service import poi_footfall
+
+        with SessionLocal() as db:
+            driver_counts.get(db, None)
+            poi_footfall.ensure_fresh(db)
+    except Exception as e:
+        # A cold start is slower, not broken
+        logger.warning("Startup warm-up failed, continuing cold: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in each worker after the fork, unlike anything done at import
+    configure_logging()
+    if settings.STARTUP_WARMUP_ENABLED:
+        await run_in_threadpool(warm_up)
+    if settings.AUDIT_ENABLED:
+        audit_writer.start()
+    if settings.EVENT_REDIS_URL:
+        event_relay.start()
+    else:
+        logger.info("EVENT_REDIS_URL not set: live events reach only this worker's subscribers")
+    yield
+    event_relay.stop()
+    # Flush queued audit events before the worker exits
+    audit_writer.stop()
+
+
+@router.get("/")
 def read_root():
     return {"message": "Welcome to Transit Advertising API"}
 
-@app.get("/health")
+@router.get("/health")
 def health_check(db: Session = Depends(get_db)):
     try:
         # Use text() to properly format the SQL query
@@ -23,5 +68,32 @@ def health_check(db: Session = Depends(get_db)):
     except Exception as e:
         return {"status": "unhealthy", "database": str(e)}
 
-# Include API router
-app.include_router(api_router, prefix=settings.API_V1_STR)
\ No newline at end of file
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    # Every live worker's metrics under gunicorn; see metrics_registry
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
+
+
+def create_app() -> FastAPI:
+    """Build the application.
+
+    Building it opens nothing: engines, log files and caches are set up by
+    the lifespan hooks of the process that serves (`uvicorn --factory
+    app.main:create_app`, or `app.main:app` below).
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        version=settings.VERSION,
+        lifespan=lifespan,
+    )
+    app.add_middleware(MetricsMiddleware)
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+
+    app.include_router(router)
+    # Include API router
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    return app
+
+
+app = create_app()
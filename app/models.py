@@ -1,10 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Numeric, Date, CheckConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Numeric, Date, CheckConstraint, Computed, Text, LargeBinary, SmallInteger
 from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2 import Geography
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Index
+from sqlalchemy import Index, text
 
 Base = declarative_base()
 
@@ -17,6 +17,12 @@ class Driver(Base):
     vehicle_details = Column(JSONB, nullable=False)  # Make required
     registration_date = Column(DateTime, default=datetime.utcnow)
     status = Column(String(20), default='active')
+    # Generated from the JSONB documents so lookups can use plain indexes
+    phone = Column(Text, Computed("contact_info->>'phone'", persisted=True))
+    plate_number = Column(
+        Text,
+        Computed("COALESCE(NULLIF(vehicle_details->>'plate_number', ''), vehicle_details->>'plate')", persisted=True)
+    )
 
     __table_args__ = (
         CheckConstraint(
@@ -24,7 +30,13 @@ class Driver(Base):
             name='valid_driver_status'
         ),
         Index('idx_driver_status', 'status'),
-        Index('idx_driver_registration', 'registration_date')
+        Index('idx_driver_registration', 'registration_date'),
+        # text_pattern_ops serves both equality and prefix (LIKE 'abc%') lookups
+        Index('uq_drivers_phone', 'phone', unique=True, postgresql_ops={'phone': 'text_pattern_ops'}),
+        Index('uq_drivers_plate_number', 'plate_number', unique=True,
+              postgresql_ops={'plate_number': 'text_pattern_ops'}),
+        # GiST (not GIN) so fuzzy search can return nearest matches in index order
+        Index('idx_drivers_name_trgm', 'name', postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'}),
     )
 
 
@@ -43,6 +55,9 @@ class Session(Base):
     __table_args__ = (
         CheckConstraint('end_time IS NULL OR end_time > start_time', 
                        name='valid_session_timeline'),
+        Index('idx_sessions_driver_start', 'driver_id', 'start_time'),
+        # At most one active session per driver; also the ON CONFLICT arbiter in start_session
+        Index('uq_sessions_driver_active', 'driver_id', unique=True, postgresql_where=text("status = 'active'")),
     )
 
 class Coordinate(Base):
@@ -51,12 +66,19 @@ class Coordinate(Base):
     coord_id = Column(Integer, primary_key=True)
     session_id = Column(Integer, ForeignKey('sessions.session_id'))
     timestamp = Column(DateTime, nullable=False)
-    location = Column(Geography(geometry_type='POINT', srid=4326))
+    location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False))
     speed = Column(Float)
     altitude = Column(Float)
     accuracy = Column(Float)
     bearing = Column(Float)
 
+    __table_args__ = (
+        Index('idx_coordinates_session_time', 'session_id', 'timestamp'),
+        # Rows arrive in time order, so a BRIN index stays tiny and serves time-range scans
+        Index('idx_coordinates_timestamp_brin', 'timestamp', postgresql_using='brin'),
+        Index('idx_coordinates_location', 'location', postgresql_using='gist'),
+    )
+
 
 class Brand(Base):
     __tablename__ = "brands"
@@ -73,10 +95,15 @@ class Impression(Base):
     
     impression_id = Column(Integer, primary_key=True)
     campaign_id = Column(Integer, ForeignKey('campaigns.campaign_id'))
-    location = Column(Geography(geometry_type='POINT', srid=4326))
+    location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False))
     timestamp = Column(DateTime)
     impression_count = Column(Integer)
 
+    __table_args__ = (
+        Index('idx_impressions_campaign_time', 'campaign_id', 'timestamp'),
+        Index('idx_impressions_location', 'location', postgresql_using='gist'),
+    )
+
 class Report(Base):
     __tablename__ = "reports"
     
@@ -126,6 +153,7 @@ class Campaign(Base):
     __table_args__ = (
         CheckConstraint('end_date >= start_date', name='valid_campaign_dates'),
         CheckConstraint('actual_spend <= budget', name='budget_limit'),
+        Index('idx_campaign_status_dates', 'status', 'start_date', 'end_date'),
     )
 
 
@@ -139,16 +167,26 @@ class ArchivedSession(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     archived_at = Column(DateTime, default=datetime.utcnow)
 
-class ArchivedCoordinate(Base):
-    __tablename__ = "archived_coordinates"
-    coord_id = Column(Integer, primary_key=True)
-    session_id = Column(Integer, ForeignKey('sessions.session_id'))
-    timestamp = Column(DateTime, nullable=False)
-    location = Column(Geography(geometry_type='POINT', srid=4326))
-    speed = Column(Float)
-    altitude = Column(Float)
-    bearing = Column(Float)
-    accuracy = Column(Float)
+class ArchivedTrack(Base):
+    """All points of an archived session in one row.
+
+    Each column holds one delta-encoded, zlib-compressed array; see
+    app.services.archive_service for the layout.
+    """
+    __tablename__ = "archived_tracks"
+    session_id = Column(Integer, ForeignKey('sessions.session_id'), primary_key=True)
+    encoding = Column(SmallInteger, nullable=False)
+    point_count = Column(Integer, nullable=False)
+    start_time = Column(DateTime)
+    end_time = Column(DateTime)
+    coord_ids = Column(LargeBinary, nullable=False)
+    timestamps = Column(LargeBinary, nullable=False)
+    latitudes = Column(LargeBinary, nullable=False)
+    longitudes = Column(LargeBinary, nullable=False)
+    speeds = Column(LargeBinary, nullable=False)
+    altitudes = Column(LargeBinary, nullable=False)
+    bearings = Column(LargeBinary, nullable=False)
+    accuracies = Column(LargeBinary, nullable=False)
     archived_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -158,20 +196,17 @@ class POI(Base):
     poi_id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)
     category = Column(String(50))
-    location = Column(Geography(geometry_type='POINT', srid=4326))
+    location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False))
     footfall_estimate = Column(Integer)
     peak_hours = Column(JSONB)  # Store hourly footfall patterns
     demographic_data = Column(JSONB)  # Store demographic information
     operational_hours = Column(JSONB)  # Store opening hours
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-
-__table_args__ = (
-    Index('idx_coordinates_session_time', 'session_id', 'timestamp'),
-    Index('idx_campaign_status_dates', 'status', 'start_date', 'end_date'),
-    Index('idx_poi_location', 'location', postgresql_using='gist'),
-    Index('idx_impressions_campaign_time', 'campaign_id', 'timestamp')
-)
+    __table_args__ = (
+        Index('idx_poi_location', 'location', postgresql_using='gist'),
+        Index('idx_pois_updated_at', 'updated_at'),
+    )
 
 
 class BillingRecord(Base):
@@ -47,6 +47,7 @@ class PaginatedDriverResponse(BaseModel):
     items: List[DriverResponse]
     page: int
     pages: int
+    total_is_estimate: bool = False
 
     class Config:
         from_attributes = True
@@ -0,0 +1,177 @@
+import struct
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .. import models
+
+# Bumped whenever the layout below changes; stored on every track
+ENCODING_VERSION = 1
+
+# Floats are stored as integers of 1/scale units: 1e-7 degrees is ~1.1 cm,
+# 0.01 is well below the precision of the GPS readings themselves
+FLOAT_COLUMNS = {
+    "latitudes": 1e7,
+    "longitudes": 1e7,
+    "speeds": 100.0,
+    "altitudes": 100.0,
+    "bearings": 100.0,
+    "accuracies": 100.0,
+}
+INTEGER_COLUMNS = ("coord_ids", "timestamps")
+
+# count, index into _WIDTHS, has nulls, scale
+_HEADER = struct.Struct("<IB?d")
+_WIDTHS = tuple(np.dtype(code) for code in ("<u1", "<u2", "<u4", "<u8"))
+_COMPRESSION_LEVEL = 6
+
+
+def encode_column(values: np.ndarray, scale: float = 1.0) -> bytes:
+    """Quantize, delta-encode, zigzag, pack into the narrowest width and compress.
+
+    Float arrays may hold NaN for missing values; those go into a bitmap.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        nulls = np.isnan(values)
+        integers = np.rint(values[~nulls] * scale).astype(np.int64)
+    else:
+        nulls = np.zeros(len(values), dtype=bool)
+        integers = values.astype(np.int64)
+
+    deltas = np.diff(integers, prepend=np.int64(0))
+    zigzag = ((deltas << 1) ^ (deltas >> 63)).view(np.uint64)
+    largest = int(zigzag.max()) if zigzag.size else 0
+    width = next(i for i, dtype in enumerate(_WIDTHS) if largest <= np.iinfo(dtype).max)
+
+    has_nulls = bool(nulls.any())
+    parts = [_HEADER.pack(len(values), width, has_nulls, scale)]
+    if has_nulls:
+        parts.append(np.packbits(nulls).tobytes())
+    parts.append(zigzag.astype(_WIDTHS[width]).tobytes())
+    return zlib.compress(b"".join(parts), _COMPRESSION_LEVEL)
+
+
+def decode_column(blob: bytes, as_float: bool = True) -> np.ndarray:
+    """Inverse of `encode_column`: float64 with NaN for nulls, or raw int64."""
+    raw = zlib.decompress(blob)
+    count, width, has_nulls, scale = _HEADER.unpack_from(raw)
+    offset = _HEADER.size
+    nulls = None
+    if has_nulls:
+        nbytes = (count + 7) // 8
+        nulls = np.unpackbits(np.frombuffer(raw, np.uint8, nbytes, offset), count=count).astype(bool)
+        offset += nbytes
+
+    zigzag = np.frombuffer(raw, _WIDTHS[width], offset=offset).astype(np.uint64)
+    deltas = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+    integers = np.cumsum(deltas)
+    if not as_float:
+        return integers
+
+    values = np.full(count, np.nan)
+    if nulls is None:
+        values[:] = integers / scale
+    else:
+        values[~nulls] = integers / scale
+    return values
+
+
+def encode_track(
+    session_id: int,
+    coord_ids: Sequence[int],
+    timestamps: Sequence,
+    latitudes: Sequence[Optional[float]],
+    longitudes: Sequence[Optional[float]],
+    speeds: Sequence[Optional[float]],
+    altitudes: Sequence[Optional[float]],
+    bearings: Sequence[Optional[float]],
+    accuracies: Sequence[Optional[float]],
+) -> Dict[str, Any]:
+    """Column values for an `ArchivedTrack` row; points are stored in time order."""
+    columns = {
+        "coord_ids": np.asarray(coord_ids, dtype=np.int64),
+        # Naive UTC datetimes, as stored everywhere else, in microseconds
+        "timestamps": np.asarray(timestamps, dtype="datetime64[us]").astype(np.int64),
+    }
+    for name, values in (
+        ("latitudes", latitudes), ("longitudes", longitudes), ("speeds", speeds),
+        ("altitudes", altitudes), ("bearings", bearings), ("accuracies", accuracies),
+    ):
+        # None becomes NaN
+        columns[name] = np.asarray(values, dtype=np.float64)
+
+    order = np.lexsort((columns["coord_ids"], columns["timestamps"]))
+    columns = {name: values[order] for name, values in columns.items()}
+
+    times = columns["timestamps"].astype("datetime64[us]")
+    track = {
+        "session_id": session_id,
+        "encoding": ENCODING_VERSION,
+        "point_count": len(times),
+        "start_time": times[0].item() if len(times) else None,
+        "end_time": times[-1].item() if len(times) else None,
+    }
+    for name in INTEGER_COLUMNS:
+        track[name] = encode_column(columns[name])
+    for name, scale in FLOAT_COLUMNS.items():
+        track[name] = encode_column(columns[name], scale)
+    return track
+
+
+def track_from_rows(session_id: int, rows: Iterable[Sequence]) -> Dict[str, Any]:
+    """`encode_track` from (coord_id, timestamp, latitude, longitude, speed,
+    altitude, bearing, accuracy) rows."""
+    rows = list(rows)
+    columns = list(zip(*rows)) if rows else [()] * 8
+    return encode_track(session_id, *columns)
+
+
+def decode_track(track: models.ArchivedTrack) -> Dict[str, np.ndarray]:
+    if track.encoding != ENCODING_VERSION:
+        raise ValueError(f"Unsupported archived track encoding {track.encoding}")
+    columns = {name: decode_column(getattr(track, name), as_float=False) for name in INTEGER_COLUMNS}
+    columns["timestamps"] = columns["timestamps"].astype("datetime64[us]")
+    for name in FLOAT_COLUMNS:
+        columns[name] = decode_column(getattr(track, name))
+    return columns
+
+
+def _optional(values: np.ndarray) -> np.ndarray:
+    result = values.astype(object)
+    result[np.isnan(values)] = None
+    return result
+
+
+def track_coordinates(track: models.ArchivedTrack, skip: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Points of an archived track shaped like the live coordinates endpoint."""
+    columns = decode_track(track)
+    # The live endpoint leaves out points without a location
+    located = ~(np.isnan(columns["latitudes"]) | np.isnan(columns["longitudes"]))
+    end = None if limit is None else skip + limit
+    columns = {name: values[located][skip:end] for name, values in columns.items()}
+
+    return [
+        {
+            "coord_id": coord_id,
+            "session_id": track.session_id,
+            "timestamp": timestamp,
+            "latitude": latitude,
+            "longitude": longitude,
+            "speed": speed,
+            "altitude": altitude,
+            "bearing": bearing,
+            "accuracy": accuracy,
+        }
+        for coord_id, timestamp, latitude, longitude, speed, altitude, bearing, accuracy in zip(
+            columns["coord_ids"].tolist(),
+            columns["timestamps"].astype(object),
+            columns["latitudes"].tolist(),
+            columns["longitudes"].tolist(),
+            _optional(columns["speeds"]),
+            _optional(columns["altitudes"]),
+            _optional(columns["bearings"]),
+            _optional(columns["accuracies"]),
+        )
+    ]
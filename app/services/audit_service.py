@@ -0,0 +1,233 @@
+import asyncio
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import NO_VALUE
+
+from .. import models
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import current_request_stats
+from ..db import SessionLocal, get_engine
+
+AUDITED_ENTITIES = {
+    models.Driver: "driver",
+    models.Session: "session",
+    models.Campaign: "campaign",
+}
+
+AUDIT_EVENTS_WRITTEN = Counter("audit_events_written_total", "Audit log rows inserted")
+AUDIT_EVENTS_DROPPED = Counter("audit_events_dropped_total", "Audit events dropped because the queue was full")
+AUDIT_QUEUE_DEPTH = Gauge("audit_queue_depth", "Audit events waiting to be written", multiprocess_mode="livesum")
+
+
+def _client_ip() -> Optional[str]:
+    stats = current_request_stats()
+    client = stats.scope.get("client") if stats is not None else None
+    return client[0] if client else None
+
+
+def _entry(entity_type: str, entity_id: int, action: str, changes: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": action,
+        # Encoded now: the ORM values may be mutated after the commit
+        "changes": jsonable_encoder(changes),
+        "performed_at": datetime.utcnow(),
+        "ip_address": _client_ip(),
+    }
+
+
+def _object_changes(obj, action: str) -> Dict[str, Any]:
+    state = inspect(obj)
+    changes = {}
+    for attr in state.mapper.column_attrs:
+        column = attr.columns[0]
+        if column.computed is not None:
+            # Generated columns are derived from audited JSONB columns
+            continue
+        if action in ("create", "delete"):
+            # Only what is already loaded; never trigger SQL from inside a flush
+            value = state.attrs[attr.key].loaded_value
+            if value is not NO_VALUE:
+                changes[attr.key] = {"new": value} if action == "create" else {"old": value}
+        else:
+            history = state.attrs[attr.key].history
+            if history.has_changes():
+                changes[attr.key] = {
+                    "old": history.deleted[0] if history.deleted else None,
+                    "new": history.added[0] if history.added else None,
+                }
+    return changes
+
+
+def _pending(session) -> List[Dict[str, Any]]:
+    return session.info.setdefault("audit_pending", [])
+
+
+def record_change(session, entity_type: str, entity_id: int, action: str, changes: Dict[str, Any]) -> None:
+    """Audit a write made with a Core statement, which bypasses the flush hooks.
+
+    RETURNING only yields the new row; callers that want "old" values read
+    them in the same statement (see the driver status endpoints).
+    """
+    if settings.AUDIT_ENABLED:
+        _pending(session).append(_entry(entity_type, entity_id, action, changes))
+
+
+def _after_flush(session, flush_context) -> None:
+    if not settings.AUDIT_ENABLED:
+        return
+    pending = _pending(session)
+    for objects, action in ((session.new, "create"), (session.dirty, "update"), (session.deleted, "delete")):
+        for obj in objects:
+            entity_type = AUDITED_ENTITIES.get(type(obj))
+            if entity_type is None:
+                continue
+            if action == "update" and not session.is_modified(obj, include_collections=False):
+                continue
+            changes = _object_changes(obj, action)
+            if action == "update" and not changes:
+                continue
+            entity_id = inspect(obj).identity[0]
+            pending.append(_entry(entity_type, entity_id, action, changes))
+
+
+def _after_commit(session) -> None:
+    pending = session.info.pop("audit_pending", None)
+    if pending:
+        audit_writer.enqueue(pending)
+
+
+def _after_soft_rollback(session, previous_transaction) -> None:
+    session.info.pop("audit_pending", None)
+
+
+event.listen(SessionLocal, "after_flush", _after_flush)
+event.listen(SessionLocal, "after_commit", _after_commit)
+event.listen(SessionLocal, "after_soft_rollback", _after_soft_rollback)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AuditLogWriter:
+    """Bounded in-memory queue drained by a background thread in batches.
+
+    Mutations only pay for a queue put. When the queue is full the policy
+    decides: "drop" discards the event (counted in audit_events_dropped_total),
+    "block" waits up to AUDIT_BLOCK_TIMEOUT_SECONDS for space, then drops.
+    Commits made on the event loop (async endpoints) always drop: blocking
+    there would stall every request of the worker.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float, policy: str, block_timeout: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_size)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        # Binds SessionLocal in this process before the thread uses it
+        get_engine()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Write everything still queued, then stop the writer thread."""
+        if not self.running:
+            return
+        # The stop marker must get in even when the queue is full
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, entries: List[Dict[str, Any]]) -> None:
+        if not self.running:
+            # No writer (e.g. a script without the app lifespan): don't accumulate
+            return
+        block = self.policy == "block" and not _on_event_loop()
+        for entry in entries:
+            try:
+                if block:
+                    self._queue.put(entry, timeout=self.block_timeout)
+                else:
+                    self._queue.put_nowait(entry)
+            except queue.Full:
+                AUDIT_EVENTS_DROPPED.inc()
+                logger.warning(
+                    "Audit queue full, dropped %s %s %s",
+                    entry["action"], entry["entity_type"], entry["entity_id"]
+                )
+        AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    # Drain whatever was queued before the stop marker
+                    while True:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                    break
+                batch.append(item)
+            AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+            for start in range(0, len(batch), self.batch_size):
+                self._write(batch[start:start + self.batch_size])
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.AuditLog), batch)
+            db.commit()
+            AUDIT_EVENTS_WRITTEN.inc(len(batch))
+        except Exception as e:
+            db.rollback()
+            AUDIT_EVENTS_DROPPED.inc(len(batch))
+            logger.error("Failed to write %d audit log rows: %s", len(batch), e)
+        finally:
+            db.close()
+
+
+audit_writer = AuditLogWriter(
+    max_size=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    policy=settings.AUDIT_QUEUE_POLICY,
+    block_timeout=settings.AUDIT_BLOCK_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import Request, Response
+from prometheus_client import Counter, Gauge
+
+from ..core.config import settings
+
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total", "Response cache lookups", ["result"]
+)
+RESPONSE_CACHE_BYTES = Gauge("response_cache_bytes", "Bytes of cached response bodies", multiprocess_mode="livesum")
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+# Clients may store it but must revalidate, which costs a 304 at most
+MUTABLE_CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "immutable", "expires_at", "tags")
+
+    def __init__(self, body: bytes, immutable: bool, expires_at: Optional[float], tags: Set[str]):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.immutable = immutable
+        self.expires_at = expires_at
+        self.tags = tags
+
+    def to_response(self, request: Request) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if self.immutable else MUTABLE_CACHE_CONTROL,
+        }
+        if _etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """LRU of serialized JSON responses, bounded by total body size.
+
+    Entries carry tags ("session:12:coordinates", "drivers", ...) that write
+    endpoints invalidate after committing. Immutable entries (data of
+    completed sessions) never expire and leave only by LRU eviction or
+    invalidation; mutable ones also expire after `ttl` seconds, which
+    bounds staleness from writes handled by other workers.
+
+    Each invalidation is numbered, and the number of the latest one is
+    kept per tag for the most recent `max_tracked_tags` tags. `put` then
+    refuses a response only if one of its own tags was invalidated after
+    the read began; writes to other sessions or drivers don't stop it.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, enabled: bool = True, max_tracked_tags: int = 10000):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.max_tracked_tags = max_tracked_tags
+        # tag -> generation of its last invalidation, least recent first
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        # Reads that began before this may have missed a forgotten invalidation
+        self._floor = 0
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        return f"{request.url.path}?{'&'.join(sorted(request.url.query.split('&')))}"
+
+    @property
+    def generation(self) -> int:
+        """Read before querying; pass to `put` so racing writes to its tags aren't cached over."""
+        return self._generation
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                RESPONSE_CACHE_REQUESTS.labels("miss").inc()
+                return None
+            self._entries.move_to_end(key)
+        RESPONSE_CACHE_REQUESTS.labels("hit").inc()
+        return entry
+
+    def put(self, key: str, body: bytes, tags: Iterable[str], immutable: bool, generation: int) -> CachedResponse:
+        expires_at = None if immutable else time.monotonic() + self.ttl
+        entry = CachedResponse(body, immutable, expires_at, set(tags))
+        if not self.enabled or len(body) > self.max_bytes:
+            return entry
+        with self._lock:
+            # Don't cache a response that a concurrent write has already made stale
+            if generation < self._floor or any(
+                self._invalidated.get(tag, 0) > generation for tag in entry.tags
+            ):
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += len(body)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+            RESPONSE_CACHE_BYTES.set(self._size)
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._invalidated[tag] = self._generation
+                self._invalidated.move_to_end(tag)
+                for key in self._tags.get(tag, set()).copy():
+                    self._remove(key)
+            while len(self._invalidated) > self.max_tracked_tags:
+                _, self._floor = self._invalidated.popitem(last=False)
+            RESPONSE_CACHE_BYTES.set(self._size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._floor = self._generation
+            self._invalidated.clear()
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+            RESPONSE_CACHE_BYTES.set(0)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def session_coordinates_tag(session_id: int) -> str:
+    return f"session:{session_id}:coordinates"
+
+
+def driver_sessions_tag(driver_id: int) -> str:
+    return f"driver:{driver_id}:sessions"
+
+
+DRIVERS_TAG = "drivers"
+
+
+response_cache = ResponseCache(
+    settings.RESPONSE_CACHE_MAX_BYTES,
+    settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
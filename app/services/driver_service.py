@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Text, case, cast, func, literal, literal_column, select, text
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
+from sqlalchemy.orm import Session
+
+from .. import db as database, models
+from ..core.config import settings
+
+
+def _key(name: str):
+    # Inline literal: a bound parameter has no type inside json_build_object(VARIADIC "any")
+    return literal_column(f"'{name}'")
+
+
+def _field(document, name: str, default=None):
+    """`document->name`, falling back to a JSON default when the key is missing."""
+    value = document[name]
+    if default is None:
+        return value
+    return func.coalesce(value, cast(literal(json.dumps(default), Text), JSONB))
+
+
+# Same defaults older rows used to get from a Python loop, applied by Postgres
+CONTACT_INFO_JSON = func.jsonb_build_object(
+    _key("phone"), _field(models.Driver.contact_info, "phone", ""),
+    _key("email"), _field(models.Driver.contact_info, "email", "user@example.com"),
+    _key("address"), _field(models.Driver.contact_info, "address", "Address not provided"),
+    _key("emergency_contact"), _field(models.Driver.contact_info, "emergency_contact"),
+)
+
+VEHICLE_DETAILS_JSON = func.jsonb_build_object(
+    _key("type"), _field(models.Driver.vehicle_details, "type", ""),
+    _key("make"), _field(models.Driver.vehicle_details, "make", ""),
+    _key("model"), _field(models.Driver.vehicle_details, "model", ""),
+    _key("year"), _field(models.Driver.vehicle_details, "year", 2000),
+    # `plate` only stands in for a missing or empty `plate_number`
+    _key("plate_number"), func.to_jsonb(func.coalesce(
+        func.nullif(models.Driver.vehicle_details["plate_number"].astext, ""),
+        models.Driver.vehicle_details["plate"].astext,
+        "",
+    )),
+    _key("color"), _field(models.Driver.vehicle_details, "color"),
+)
+
+def _iso_timestamp(column):
+    """A timestamp as the API's JSON encoder writes it: microseconds only when non-zero."""
+    return func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS') + case(
+        (func.date_trunc("second", column) != column, func.to_char(column, ".US")),
+        else_="",
+    )
+
+
+DRIVER_JSON = func.json_build_object(
+    _key("driver_id"), models.Driver.driver_id,
+    _key("name"), models.Driver.name,
+    _key("contact_info"), CONTACT_INFO_JSON,
+    _key("vehicle_details"), VEHICLE_DETAILS_JSON,
+    _key("status"), models.Driver.status,
+    _key("registration_date"), _iso_timestamp(models.Driver.registration_date),
+)
+
+
+def driver_page_json(db: Session, status: Optional[str], skip: int, limit: int) -> str:
+    """One page of drivers as a JSON array, normalized and serialized by Postgres."""
+    page = select(models.Driver.driver_id, DRIVER_JSON.label("item"))
+    if status:
+        page = page.where(models.Driver.status == status)
+    page = page.order_by(models.Driver.driver_id).offset(skip).limit(limit).subquery()
+
+    # ::text keeps the driver from parsing the JSON only for us to re-encode it
+    stmt = select(
+        cast(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(page.c.item, page.c.driver_id)),
+                literal_column("'[]'::json"),
+            ),
+            Text,
+        )
+    )
+    return db.execute(stmt).scalar()
+
+
+def _exact_count(db: Session, status: Optional[str]) -> int:
+    query = select(func.count()).select_from(models.Driver)
+    if status:
+        query = query.where(models.Driver.status == status)
+    return db.execute(query).scalar()
+
+
+def estimate_driver_count(db: Session, status: Optional[str]) -> int:
+    """Row estimate from planner statistics; no table scan, accurate to the last ANALYZE."""
+    if status:
+        plan = db.execute(
+            text("EXPLAIN (FORMAT JSON) SELECT 1 FROM drivers WHERE status = :status"),
+            {"status": status}
+        ).scalar()
+    else:
+        plan = db.execute(text("EXPLAIN (FORMAT JSON) SELECT 1 FROM drivers")).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _reads_replica(db: Session) -> bool:
+    return database.read_engine is not database.engine and db.get_bind() is database.read_engine
+
+
+class DriverCountCache:
+    """Exact driver counts per status filter.
+
+    Entries are dropped by driver writes in this process and expire after
+    `ttl` seconds, which bounds staleness from writes in other workers.
+    Misses are counted on the primary: a lagging replica could otherwise
+    cache the total from before the write that just dropped the entry.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Optional[str], Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def get(self, db: Session, status: Optional[str]) -> int:
+        now = time.monotonic()
+        entry = self._entries.get(status)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        generation = self._generation
+        if _reads_replica(db):
+            with database.SessionLocal() as primary:
+                total = _exact_count(primary, status)
+        else:
+            total = _exact_count(db, status)
+        with self._lock:
+            # Don't cache a count that a concurrent write has already made stale
+            if generation == self._generation:
+                self._entries[status] = (total, now + self.ttl)
+        return total
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+driver_counts = DriverCountCache(settings.DRIVER_COUNT_CACHE_TTL_SECONDS)
@@ -0,0 +1,350 @@
+import asyncio
+import json
+import queue
+import threading
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from ..core.config import settings
+from ..core.logger import logger
+
+
+class Event:
+    """A single fan-out message.
+
+    `driver_id` and `location` (lon, lat) are only used for subscriber
+    filtering and are not part of the payload sent to clients.
+    `key` groups events that supersede each other: when a subscriber is
+    slow, only the newest event per key is kept in its buffer.
+    """
+
+    __slots__ = ("id", "type", "data", "key", "driver_id", "location")
+
+    def __init__(
+        self,
+        id: int,
+        type: str,
+        data: Dict[str, Any],
+        key: Optional[Hashable] = None,
+        driver_id: Optional[int] = None,
+        location: Optional[Tuple[float, float]] = None,
+    ):
+        self.id = id
+        self.type = type
+        self.data = data
+        self.key = key
+        self.driver_id = driver_id
+        self.location = location
+
+
+class EventFilter:
+    """Subscriber-side filter. Empty criteria match everything."""
+
+    def __init__(
+        self,
+        driver_ids: Optional[Iterable[int]] = None,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        event_types: Optional[Iterable[str]] = None,
+    ):
+        self.driver_ids = frozenset(driver_ids) if driver_ids else None
+        self.bbox = bbox
+        self.event_types = frozenset(event_types) if event_types else None
+
+    @classmethod
+    def from_params(
+        cls,
+        driver_ids: Optional[List[int]] = None,
+        bbox: Optional[str] = None,
+        event_types: Optional[List[str]] = None,
+    ) -> "EventFilter":
+        """Build a filter from query parameters; `bbox` is "min_lon,min_lat,max_lon,max_lat"."""
+        parsed_bbox = None
+        if bbox:
+            try:
+                min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+            except ValueError:
+                raise ValueError("bbox must be 'min_lon,min_lat,max_lon,max_lat'")
+            if min_lon > max_lon or min_lat > max_lat:
+                raise ValueError("bbox minimums must not exceed maximums")
+            parsed_bbox = (min_lon, min_lat, max_lon, max_lat)
+        return cls(driver_ids, parsed_bbox, event_types)
+
+    def matches(self, event: Event) -> bool:
+        if self.event_types is not None and event.type not in self.event_types:
+            return False
+        if self.driver_ids is not None and event.driver_id not in self.driver_ids:
+            return False
+        if self.bbox is not None:
+            if event.location is None:
+                return False
+            lon, lat = event.location
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+                return False
+        return True
+
+
+class Subscription:
+    """Bounded, coalescing buffer for one client.
+
+    `offer` may be called from any thread (sync endpoints run in the
+    threadpool); `next_batch` must be awaited on the loop the subscription
+    was created on. When the buffer is full the oldest pending event is
+    dropped, so a slow client only ever loses its own updates.
+    """
+
+    def __init__(self, event_filter: EventFilter, max_buffer: int):
+        self.filter = event_filter
+        self.max_buffer = max_buffer
+        self.dropped = 0
+        self._buffer: "OrderedDict[Hashable, Event]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def offer(self, event: Event) -> None:
+        key = event.key if event.key is not None else ("event", event.id)
+        with self._lock:
+            if key in self._buffer:
+                # Superseded update: drop the stale one, keep arrival order
+                del self._buffer[key]
+            self._buffer[key] = event
+            if len(self._buffer) > self.max_buffer:
+                self._buffer.popitem(last=False)
+                self.dropped += 1
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Loop already closed; the subscriber is gone
+            pass
+
+    async def next_batch(self, timeout: Optional[float] = None) -> List[Event]:
+        """Wait for pending events and drain them. Returns [] on timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        with self._lock:
+            self._ready.clear()
+            batch = list(self._buffer.values())
+            self._buffer.clear()
+        return batch
+
+
+class EventBroker:
+    """Pub/sub: events are published once and fanned out to every matching subscriber.
+
+    Subscribers are local to the worker. While a `RedisEventRelay` is
+    running, publishing goes through Redis and every worker (this one
+    included) fans the event out to its own subscribers; without one,
+    only subscribers of the publishing worker see it.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self.relay: Optional["RedisEventRelay"] = None
+
+    def subscribe(self, event_filter: EventFilter, max_buffer: Optional[int] = None) -> Subscription:
+        subscription = Subscription(event_filter, max_buffer or settings.EVENT_SUBSCRIBER_BUFFER)
+        with self._lock:
+            self._subscribers = self._subscribers + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscription]
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        key: Optional[Hashable] = None,
+        driver_id: Optional[int] = None,
+        location: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        relay = self.relay
+        if relay is not None and relay.running:
+            relay.send(event_type, data, key, driver_id, location)
+        else:
+            self.deliver(event_type, data, key, driver_id, location)
+
+    def deliver(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        key: Optional[Hashable] = None,
+        driver_id: Optional[int] = None,
+        location: Optional[Tuple[float, float]] = None,
+    ) -> None:
+        """Fan an event out to this worker's subscribers."""
+        # Copy-on-write subscriber list, so delivering never blocks on subscribe/unsubscribe
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = Event(next(self._ids), event_type, data, key, driver_id, location)
+        for subscription in subscribers:
+            if subscription.filter.matches(event):
+                subscription.offer(event)
+
+
+def _encode_event(event_type, data, key, driver_id, location) -> str:
+    return json.dumps({
+        "type": event_type,
+        "data": jsonable_encoder(data),
+        "key": key,
+        "driver_id": driver_id,
+        "location": location,
+    })
+
+
+def _decode_event(message) -> Tuple[str, Dict[str, Any], Optional[Hashable], Optional[int], Optional[Tuple[float, float]]]:
+    decoded = json.loads(message)
+    # JSON turns the tuples back into lists
+    key = decoded["key"]
+    location = decoded["location"]
+    return (
+        decoded["type"],
+        decoded["data"],
+        tuple(key) if isinstance(key, list) else key,
+        decoded["driver_id"],
+        tuple(location) if location is not None else None,
+    )
+
+
+class RedisEventRelay:
+    """Carries a broker's events between workers over one Redis pub/sub channel.
+
+    Every worker publishes to the channel and listens on it, so a client
+    sees events ingested by any worker, whichever one it is connected to.
+    Publishing is handed to a background thread through a bounded queue;
+    request threads and the event loop never wait on Redis. Events that
+    cannot reach Redis are still delivered to this worker's subscribers.
+    """
+
+    _STOP = object()
+
+    def __init__(self, broker: EventBroker, url: str, channel: str, max_pending: int):
+        self.broker = broker
+        self.url = url
+        self.channel = channel
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._client = None
+        self._pubsub = None
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stopping.is_set()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        # Imported here to keep it off the import path of single-worker setups
+        import redis
+
+        self._client = redis.Redis.from_url(self.url, socket_timeout=5, health_check_interval=30)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        try:
+            # Subscribed before start() returns, so nothing published afterwards is missed
+            self._pubsub.subscribe(self.channel)
+        except Exception as e:
+            logger.warning("Event relay could not subscribe to Redis yet, retrying: %s", e)
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._publish_loop, name="event-relay-publish", daemon=True),
+            threading.Thread(target=self._listen_loop, name="event-relay-listen", daemon=True),
+        ]
+        self.broker.relay = self
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if not self._threads:
+            return
+        self.broker.relay = None
+        self._stopping.set()
+        self._queue.put(self._STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pubsub.close()
+        self._client.close()
+
+    def send(self, event_type, data, key=None, driver_id=None, location=None) -> None:
+        try:
+            self._queue.put_nowait((event_type, data, key, driver_id, location))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning("Event relay queue full, %d events dropped so far", self.dropped)
+
+    def _publish_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            try:
+                self._client.publish(self.channel, _encode_event(*item))
+            except Exception as e:
+                logger.warning("Event relay publish failed, delivering to this worker only: %s", e)
+                self.broker.deliver(*item)
+
+    def _listen_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if not self._pubsub.subscribed:
+                    self._pubsub.subscribe(self.channel)
+                message = self._pubsub.get_message(timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                self.broker.deliver(*_decode_event(message["data"]))
+            except Exception as e:
+                if self._stopping.is_set():
+                    return
+                logger.warning("Event relay lost Redis, reconnecting: %s", e)
+                self._stopping.wait(1.0)
+
+
+broker = EventBroker()
+# Started by the app lifespan when EVENT_REDIS_URL is set
+event_relay = RedisEventRelay(
+    broker, settings.EVENT_REDIS_URL, settings.EVENT_REDIS_CHANNEL, settings.EVENT_RELAY_QUEUE_SIZE
+)
+
+
+def publish_session_event(event_type: str, db_session) -> None:
+    """Publish a `session.started` / `session.ended` event for a sessions row."""
+    broker.publish(
+        event_type,
+        {
+            "session_id": db_session.session_id,
+            "driver_id": db_session.driver_id,
+            "start_time": db_session.start_time,
+            "end_time": db_session.end_time,
+            "total_distance_km": db_session.total_distance_km,
+            "status": db_session.status,
+        },
+        driver_id=db_session.driver_id,
+    )
+
+
+def publish_coordinate_event(coordinate: Dict[str, Any], driver_id: Optional[int]) -> None:
+    """Publish a position update; pending updates for the same session are coalesced."""
+    broker.publish(
+        "coordinate",
+        coordinate,
+        key=("coordinate", coordinate["session_id"]),
+        driver_id=driver_id,
+        location=(coordinate["longitude"], coordinate["latitude"]),
+    )
@@ -0,0 +1,272 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from ..core.logger import logger
+
+DAYS = 7
+HOURS = 24
+# updated_at comes from the clock of whichever process wrote the row; re-read a margin
+_UPDATE_OVERLAP = timedelta(seconds=60)
+# Ids index a dense lookup array unless they are sparser than this
+_MAX_IDS_PER_ROW = 4
+
+
+def _check_weekday_hour(weekdays, hours) -> None:
+    # Negative indexes would silently wrap to the end of the week or day
+    if np.any((weekdays < 0) | (weekdays >= DAYS)):
+        raise ValueError(f"weekday must be between 0 and {DAYS - 1}")
+    if np.any((hours < 0) | (hours >= HOURS)):
+        raise ValueError(f"hour must be between 0 and {HOURS - 1}")
+
+
+def footfall_matrix(peak_hours: Any, footfall_estimate: Optional[int]) -> np.ndarray:
+    """7x24 hourly footfall (weekday 0 = Monday) from a POI's JSONB fields.
+
+    `peak_hours` may be {"day": {"hour": n}}, {"hour": n} (same every day),
+    a list of 24 values or a 7x24 list. Without it, the daily
+    `footfall_estimate` is spread evenly over the hours.
+    """
+    matrix = np.zeros((DAYS, HOURS), dtype=np.float32)
+    if isinstance(peak_hours, dict) and peak_hours:
+        if isinstance(next(iter(peak_hours.values())), dict):
+            for day, hours in peak_hours.items():
+                for hour, value in hours.items():
+                    _check_weekday_hour(int(day), int(hour))
+                    matrix[int(day), int(hour)] = value or 0
+        else:
+            for hour, value in peak_hours.items():
+                _check_weekday_hour(0, int(hour))
+                matrix[:, int(hour)] = value or 0
+    elif isinstance(peak_hours, list) and peak_hours:
+        # A single day broadcasts to the whole week
+        matrix[:] = np.asarray(peak_hours, dtype=np.float32)
+    elif footfall_estimate:
+        matrix[:] = footfall_estimate / HOURS
+    return matrix
+
+
+def weekday_hour(timestamps) -> Tuple[np.ndarray, np.ndarray]:
+    """Weekday (0 = Monday) and hour of naive UTC timestamps, vectorized."""
+    hours_since_epoch = np.asarray(timestamps, dtype="datetime64[h]").astype(np.int64)
+    # 1970-01-01 was a Thursday
+    return (hours_since_epoch // HOURS + 3) % DAYS, hours_since_epoch % HOURS
+
+
+class POISnapshot:
+    """Row-aligned, read-only arrays for every POI.
+
+    `locations[i]` is (longitude, latitude), `category_codes[i]` indexes
+    `categories` (-1 when unset) and `footfall[i]` is the 7x24 matrix of
+    POI `poi_ids[i]`. `rows_of` maps POI ids to rows: through an array
+    indexed by id while ids are dense, by binary search over the sorted
+    ids when a few large ids would make that array huge.
+    """
+
+    __slots__ = ("poi_ids", "locations", "category_codes", "footfall", "categories", "rows", "_sorted_ids", "_order")
+
+    def __init__(self, poi_ids, locations, category_codes, footfall, categories: List[str]):
+        self.poi_ids = poi_ids
+        self.locations = locations
+        self.category_codes = category_codes
+        self.footfall = footfall
+        self.categories = categories
+        self.rows = self._sorted_ids = self._order = None
+        size = int(poi_ids.max()) + 1 if len(poi_ids) else 0
+        if size <= _MAX_IDS_PER_ROW * len(poi_ids) + 1024:
+            self.rows = np.full(size, -1, dtype=np.int64)
+            self.rows[poi_ids] = np.arange(len(poi_ids))
+            lookup = (self.rows,)
+        else:
+            self._order = np.argsort(poi_ids)
+            self._sorted_ids = poi_ids[self._order]
+            lookup = (self._order, self._sorted_ids)
+        for array in (poi_ids, locations, category_codes, footfall) + lookup:
+            # Shared by every request in the process
+            array.setflags(write=False)
+
+    @classmethod
+    def empty(cls) -> "POISnapshot":
+        return cls(
+            np.empty(0, dtype=np.int64),
+            np.empty((0, 2), dtype=np.float64),
+            np.empty(0, dtype=np.int16),
+            np.empty((0, DAYS, HOURS), dtype=np.float32),
+            [],
+        )
+
+    def __len__(self) -> int:
+        return len(self.poi_ids)
+
+    def row(self, poi_id: int) -> int:
+        return int(self.rows_of(np.array([poi_id], dtype=np.int64))[0])
+
+    def rows_of(self, poi_ids: np.ndarray) -> np.ndarray:
+        """Row of each POI id, or -1 for unknown ones."""
+        rows = np.full(poi_ids.shape, -1, dtype=np.int64)
+        if self.rows is not None:
+            in_range = (poi_ids >= 0) & (poi_ids < len(self.rows))
+            rows[in_range] = self.rows[poi_ids[in_range]]
+        elif len(self._sorted_ids):
+            positions = np.minimum(np.searchsorted(self._sorted_ids, poi_ids), len(self._sorted_ids) - 1)
+            found = self._sorted_ids[positions] == poi_ids
+            rows[found] = self._order[positions[found]]
+        return rows
+
+
+class POIFootfall:
+    """Process-wide POI footfall table, refreshed incrementally from `POI.updated_at`.
+
+    Refreshes build a new `POISnapshot` and swap it in, so lookups never
+    lock and never see a half-applied refresh. Deletions leave no
+    updated_at trail: a count or sum of ids that disagrees after an
+    incremental refresh triggers a full reload, and so does every
+    `full_reload_every`-th refresh, for whatever slips past both.
+    """
+
+    def __init__(self, refresh_interval: float, full_reload_every: int = 12):
+        self.refresh_interval = refresh_interval
+        self.full_reload_every = full_reload_every
+        self._incremental_refreshes = 0
+        self._snapshot = POISnapshot.empty()
+        self._watermark: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> POISnapshot:
+        return self._snapshot
+
+    def ensure_fresh(self, db: Session) -> POISnapshot:
+        """Refresh when older than `refresh_interval`; only the first load waits."""
+        if self._refreshed_at is not None and time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return self._snapshot
+        # One caller refreshes; the others keep using the current snapshot
+        if not self._lock.acquire(blocking=self._refreshed_at is None):
+            return self._snapshot
+        try:
+            if self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_interval:
+                self._refresh(db, full=False)
+        finally:
+            self._lock.release()
+        return self._snapshot
+
+    def refresh(self, db: Session, full: bool = False) -> int:
+        """Apply POI changes now; returns the number of POIs (re)loaded."""
+        with self._lock:
+            return self._refresh(db, full)
+
+    def footfall(self, poi_id: int, weekday: int, hour: int) -> float:
+        """Footfall of one POI at (weekday, hour); 0 for unknown POIs. See `footfall_batch`."""
+        _check_weekday_hour(weekday, hour)
+        snapshot = self._snapshot
+        row = snapshot.row(poi_id)
+        return float(snapshot.footfall[row, weekday, hour]) if row >= 0 else 0.0
+
+    def footfall_batch(self, poi_ids, weekdays, hours) -> np.ndarray:
+        """Footfall for each (poi_id, weekday, hour); scalars broadcast. Unknown POIs get 0.
+
+        Raises ValueError for a weekday outside 0-6 or an hour outside 0-23.
+        """
+        snapshot = self._snapshot
+        poi_ids = np.asarray(poi_ids, dtype=np.int64)
+        weekdays = np.broadcast_to(np.asarray(weekdays, dtype=np.int64), poi_ids.shape)
+        hours = np.broadcast_to(np.asarray(hours, dtype=np.int64), poi_ids.shape)
+        _check_weekday_hour(weekdays, hours)
+
+        rows = snapshot.rows_of(poi_ids)
+        known = rows >= 0
+
+        result = np.zeros(poi_ids.shape, dtype=np.float32)
+        result[known] = snapshot.footfall[rows[known], weekdays[known], hours[known]]
+        return result
+
+    def _query(self, since: Optional[datetime]):
+        location = cast(models.POI.location, Geometry)
+        query = select(
+            models.POI.poi_id,
+            models.POI.category,
+            func.ST_X(location),
+            func.ST_Y(location),
+            models.POI.footfall_estimate,
+            models.POI.peak_hours,
+            models.POI.updated_at,
+        )
+        if since is not None:
+            query = query.where(models.POI.updated_at > since)
+        return query
+
+    def _refresh(self, db: Session, full: bool) -> int:
+        full = full or self._watermark is None or self._incremental_refreshes + 1 >= self.full_reload_every
+        since = None if full else self._watermark - _UPDATE_OVERLAP
+        changed = db.execute(self._query(since)).all()
+
+        base = POISnapshot.empty() if full else self._snapshot
+        snapshot = self._merge(base, changed)
+        if full:
+            self._incremental_refreshes = 0
+        else:
+            # A delete plus an insert keeps the count; it changes the sum of ids
+            total, id_sum = db.execute(
+                select(func.count(), func.coalesce(func.sum(models.POI.poi_id), 0))
+            ).one()
+            if (total, int(id_sum)) != (len(snapshot), int(snapshot.poi_ids.sum())):
+                logger.info("POIs changed outside updated_at (%d rows, %d loaded), reloading all", total, len(snapshot))
+                return self._refresh(db, full=True)
+            self._incremental_refreshes += 1
+
+        latest = max((row.updated_at for row in changed if row.updated_at is not None), default=None)
+        if latest is not None and (self._watermark is None or latest > self._watermark):
+            self._watermark = latest
+        self._snapshot = snapshot
+        self._refreshed_at = time.monotonic()
+        return len(changed)
+
+    def _merge(self, base: POISnapshot, changed) -> POISnapshot:
+        if not changed:
+            return base
+        categories = list(base.categories)
+        codes = {category: code for code, category in enumerate(categories)}
+
+        poi_ids = np.fromiter((row.poi_id for row in changed), dtype=np.int64, count=len(changed))
+        locations = np.array(
+            [(row[2], row[3]) for row in changed], dtype=np.float64
+        ).reshape(-1, 2)  # NULL locations become NaN
+        category_codes = np.empty(len(changed), dtype=np.int16)
+        footfall = np.empty((len(changed), DAYS, HOURS), dtype=np.float32)
+        for index, row in enumerate(changed):
+            if row.category is None:
+                category_codes[index] = -1
+            else:
+                if row.category not in codes:
+                    codes[row.category] = len(categories)
+                    categories.append(row.category)
+                category_codes[index] = codes[row.category]
+            try:
+                footfall[index] = footfall_matrix(row.peak_hours, row.footfall_estimate)
+            except (TypeError, ValueError, IndexError) as e:
+                logger.warning("Unreadable peak_hours for POI %s, using footfall_estimate: %s", row.poi_id, e)
+                footfall[index] = footfall_matrix(None, row.footfall_estimate)
+
+        # Changed POIs replace their old rows; new ones are appended
+        existing = np.array([base.row(poi_id) for poi_id in poi_ids.tolist()], dtype=np.int64)
+        keep = np.ones(len(base), dtype=bool)
+        keep[existing[existing >= 0]] = False
+        return POISnapshot(
+            np.concatenate([base.poi_ids[keep], poi_ids]),
+            np.concatenate([base.locations[keep], locations]),
+            np.concatenate([base.category_codes[keep], category_codes]),
+            np.concatenate([base.footfall[keep], footfall]),
+            categories,
+        )
+
+
+poi_footfall = POIFootfall(settings.POI_FOOTFALL_REFRESH_SECONDS, settings.POI_FOOTFALL_FULL_RELOAD_EVERY)
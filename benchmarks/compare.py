@@ -0,0 +1,47 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare bench-results/base.json bench-results/head.json --threshold 0.15
+
+Exits non-zero when any endpoint's p95 latency regressed by more than the
+threshold (relative), or its throughput dropped by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(base: dict, head: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"{'endpoint':45} {'p95 base':>10} {'p95 head':>10} {'change':>8} {'rps base':>10} {'rps head':>10}")
+    for name, head_result in head["endpoints"].items():
+        base_result = base["endpoints"].get(name)
+        if base_result is None:
+            print(f"{name:45} {'-':>10} {head_result['p95_ms']:10.2f} {'new':>8}")
+            continue
+        p95_change = (head_result["p95_ms"] - base_result["p95_ms"]) / base_result["p95_ms"] if base_result["p95_ms"] else 0.0
+        rps_change = (
+            (head_result["throughput_rps"] - base_result["throughput_rps"]) / base_result["throughput_rps"]
+            if base_result["throughput_rps"] else 0.0
+        )
+        flag = ""
+        if p95_change > threshold or rps_change < -threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:45} {base_result['p95_ms']:10.2f} {head_result['p95_ms']:10.2f} {p95_change:+8.1%} "
+              f"{base_result['throughput_rps']:10.1f} {head_result['throughput_rps']:10.1f}{flag}")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base["meta"]["scale"] != head["meta"]["scale"]:
+        print("warning: runs used different dataset scales", file=sys.stderr)
+    sys.exit(1 if compare(base, head, args.threshold) else 0)
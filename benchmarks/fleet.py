@@ -0,0 +1,160 @@
+"""Deterministic synthetic fleet data for benchmarks.
+
+Everything is derived from a single seed so two runs at the same scale
+produce identical datasets and their results can be compared.
+"""
+import math
+import random
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List
+
+# Karachi metro area; tracks and POIs are kept inside this box
+CITY_BBOX = (66.95, 24.80, 67.25, 25.05)  # min_lon, min_lat, max_lon, max_lat
+
+FIRST_NAMES = ["Ahmed", "Ali", "Bilal", "Danish", "Faisal", "Hamza", "Imran", "Kashif", "Nadeem", "Omar",
+               "Rashid", "Saad", "Tariq", "Usman", "Waqar", "Yasir", "Zain", "Asif", "Junaid", "Shahid"]
+LAST_NAMES = ["Khan", "Ahmed", "Hussain", "Sheikh", "Qureshi", "Malik", "Butt", "Siddiqui", "Raza", "Iqbal"]
+VEHICLES = [("rickshaw", "Sazgar", "Classic"), ("rickshaw", "New Asia", "CNG"), ("car", "Suzuki", "Mehran"),
+            ("car", "Toyota", "Corolla"), ("van", "Suzuki", "Bolan"), ("bus", "Hino", "Liesse")]
+POI_CATEGORIES = ["mall", "market", "school", "hospital", "restaurant", "office", "park", "station"]
+INDUSTRIES = ["telecom", "fmcg", "banking", "automotive", "food", "retail"]
+
+
+class FleetScale:
+    def __init__(
+        self,
+        drivers: int = 100,
+        sessions_per_driver: int = 3,
+        points_per_session: int = 200,
+        pois: int = 500,
+        brands: int = 10,
+        campaigns_per_brand: int = 3,
+    ):
+        self.drivers = drivers
+        self.sessions_per_driver = sessions_per_driver
+        self.points_per_session = points_per_session
+        self.pois = pois
+        self.brands = brands
+        self.campaigns_per_brand = campaigns_per_brand
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(vars(self))
+
+
+class FleetGenerator:
+    def __init__(self, scale: FleetScale, seed: int = 42):
+        self.scale = scale
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def driver(self, index: int) -> Dict:
+        """Payload accepted by POST /drivers/; phone and plate are unique per index."""
+        rng = self.rng
+        vehicle_type, make, model = rng.choice(VEHICLES)
+        return {
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "contact_info": {
+                "phone": f"+92300{index:07d}",
+                "email": f"driver{index}@example.com",
+                "address": f"House {rng.randint(1, 999)}, Block {rng.randint(1, 20)}, Karachi",
+                "emergency_contact": None,
+            },
+            "vehicle_details": {
+                "type": vehicle_type,
+                "make": make,
+                "model": model,
+                "year": rng.randint(2005, 2024),
+                "plate_number": f"KHI-{index:06d}",
+                "color": rng.choice(["white", "green", "yellow", "black", None]),
+            },
+        }
+
+    def drivers(self) -> Iterator[Dict]:
+        for index in range(self.scale.drivers):
+            yield self.driver(index)
+
+    def track(self, start_time: datetime, points: int) -> List[Dict]:
+        """A GPS track: a vehicle moving at urban speeds with gradual turns and sampling jitter."""
+        rng = self.rng
+        min_lon, min_lat, max_lon, max_lat = CITY_BBOX
+        lon = rng.uniform(min_lon, max_lon)
+        lat = rng.uniform(min_lat, max_lat)
+        bearing = rng.uniform(0, 360)
+        speed = rng.uniform(5, 12)  # m/s
+        timestamp = start_time
+        altitude = rng.uniform(5, 40)
+        track = []
+        for _ in range(points):
+            interval = rng.uniform(1, 5)
+            # Stop-and-go traffic: speed drifts, occasionally stopping at signals
+            speed = 0.0 if rng.random() < 0.03 else min(max(speed + rng.gauss(0, 1.5), 0.0), 22.0)
+            bearing = (bearing + rng.gauss(0, 12)) % 360
+            distance = speed * interval
+            lat += distance * math.cos(math.radians(bearing)) / 111_320
+            lon += distance * math.sin(math.radians(bearing)) / (111_320 * math.cos(math.radians(lat)))
+            # Turn back at the city edge instead of leaving the box
+            if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+                bearing = (bearing + 180) % 360
+                lon = min(max(lon, min_lon), max_lon)
+                lat = min(max(lat, min_lat), max_lat)
+            timestamp += timedelta(seconds=interval)
+            track.append({
+                "timestamp": timestamp,
+                "latitude": round(lat + rng.gauss(0, 0.00003), 6),
+                "longitude": round(lon + rng.gauss(0, 0.00003), 6),
+                "speed": round(speed * 3.6, 2),  # km/h
+                "altitude": round(altitude + rng.gauss(0, 1), 1),
+                "accuracy": round(rng.uniform(3, 25), 1),
+                "bearing": round(bearing, 1),
+            })
+        return track
+
+    def peak_hours(self, category: str) -> Dict[str, Dict[str, int]]:
+        """Footfall per weekday ("0"-"6") and hour ("0"-"23")."""
+        rng = self.rng
+        base = rng.randint(50, 2000)
+        peak = {"office": 10, "school": 8, "restaurant": 20, "mall": 19}.get(category, 17)
+        pattern = {}
+        for day in range(7):
+            weekend = 1.4 if day >= 5 and category in ("mall", "park", "restaurant") else 1.0
+            pattern[str(day)] = {
+                str(hour): int(base * weekend * math.exp(-((hour - peak) ** 2) / 18) * rng.uniform(0.8, 1.2))
+                for hour in range(24)
+            }
+        return pattern
+
+    def poi(self, index: int) -> Dict:
+        rng = self.rng
+        min_lon, min_lat, max_lon, max_lat = CITY_BBOX
+        category = rng.choice(POI_CATEGORIES)
+        return {
+            "name": f"{category.title()} {index}",
+            "category": category,
+            "longitude": rng.uniform(min_lon, max_lon),
+            "latitude": rng.uniform(min_lat, max_lat),
+            "footfall_estimate": rng.randint(100, 50_000),
+            "peak_hours": self.peak_hours(category),
+            "demographic_data": {"age_18_34": round(rng.random(), 2), "income_high": round(rng.random(), 2)},
+            "operational_hours": {"open": "09:00", "close": "22:00"},
+        }
+
+    def brand(self, index: int) -> Dict:
+        return {
+            "name": f"Brand {index}",
+            "industry": self.rng.choice(INDUSTRIES),
+            "contact_info": {"email": f"brand{index}@example.com"},
+        }
+
+    def campaign(self, brand_index: int, index: int, today: date) -> Dict:
+        rng = self.rng
+        start = today - timedelta(days=rng.randint(0, 30))
+        budget = rng.randint(10_000, 1_000_000)
+        return {
+            "name": f"Campaign {brand_index}-{index}",
+            "start_date": start,
+            "end_date": start + timedelta(days=rng.randint(7, 90)),
+            "budget": budget,
+            "actual_spend": round(budget * rng.uniform(0, 0.8), 2),
+            "status": rng.choice(["active", "active", "paused", "draft", "completed"]),
+            "target_audience": {"categories": rng.sample(POI_CATEGORIES, 2)},
+        }
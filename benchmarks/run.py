@@ -0,0 +1,334 @@
+"""Seed a local PostGIS with a synthetic fleet and load-test the API in-process.
+
+Point POSTGRES_* (and POSTGRES_SSLMODE=disable for a local server) at a
+scratch database, then:
+
+    python -m benchmarks.run --reset --drivers 200 --requests 1000 --concurrency 20
+
+`--reset` drops the public schema and migrates it to head. Results are written as JSON
+(see `benchmarks.compare` to diff two runs).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+from datetime import date, datetime, timedelta
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import insert, text
+
+from app import models
+from app.core.config import settings
+from app.db import SessionLocal, get_engine
+from app.main import app
+from .fleet import FleetGenerator, FleetScale
+
+API = settings.API_V1_STR
+
+
+def reset_schema() -> None:
+    """Recreate the public schema and migrate it, as the test suite does.
+
+    The migrations, not the models, own the extensions (postgis, pg_trgm)
+    and the indexes the benchmark depends on.
+    """
+    engine = get_engine()
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+    root = os.path.join(os.path.dirname(__file__), "..")
+    config = Config(os.path.join(root, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(root, "alembic"))
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
+        conn.commit()
+
+
+def seed(generator: FleetGenerator) -> Dict[str, List[int]]:
+    """Bulk-load the dataset directly; returns the ids the load phase targets."""
+    scale = generator.scale
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        drivers = []
+        for payload in generator.drivers():
+            drivers.append(models.Driver(
+                name=payload["name"],
+                contact_info=payload["contact_info"],
+                vehicle_details=payload["vehicle_details"],
+                status="active",
+                registration_date=now - timedelta(days=generator.rng.randint(0, 365)),
+            ))
+        db.add_all(drivers)
+        db.flush()
+
+        sessions = []
+        for driver in drivers:
+            start = now - timedelta(days=scale.sessions_per_driver)
+            for index in range(scale.sessions_per_driver):
+                # Every driver's latest session stays active so ingest has a target
+                active = index == scale.sessions_per_driver - 1
+                session_start = start + timedelta(days=index)
+                sessions.append(models.Session(
+                    driver_id=driver.driver_id,
+                    start_time=session_start,
+                    end_time=None if active else session_start + timedelta(hours=8),
+                    total_distance_km=None if active else round(generator.rng.uniform(20, 200), 2),
+                    status="active" if active else "completed",
+                    created_at=session_start,
+                ))
+        db.add_all(sessions)
+        db.flush()
+
+        for session in sessions:
+            rows = [
+                {
+                    "session_id": session.session_id,
+                    "timestamp": point["timestamp"],
+                    "location": f"SRID=4326;POINT({point['longitude']} {point['latitude']})",
+                    "speed": point["speed"],
+                    "altitude": point["altitude"],
+                    "accuracy": point["accuracy"],
+                    "bearing": point["bearing"],
+                }
+                for point in generator.track(session.start_time, scale.points_per_session)
+            ]
+            if rows:
+                db.execute(insert(models.Coordinate), rows)
+
+        pois = []
+        for index in range(scale.pois):
+            payload = generator.poi(index)
+            longitude, latitude = payload.pop("longitude"), payload.pop("latitude")
+            payload["location"] = f"SRID=4326;POINT({longitude} {latitude})"
+            pois.append(payload)
+        if pois:
+            db.execute(insert(models.POI), pois)
+
+        today = date.today()
+        for brand_index in range(scale.brands):
+            brand = models.Brand(**generator.brand(brand_index))
+            db.add(brand)
+            db.flush()
+            for index in range(scale.campaigns_per_brand):
+                db.add(models.Campaign(brand_id=brand.brand_id, **generator.campaign(brand_index, index, today)))
+
+        db.commit()
+        return {
+            "driver_ids": [driver.driver_id for driver in drivers],
+            "active_session_ids": [s.session_id for s in sessions if s.status == "active"],
+            "completed_session_ids": [s.session_id for s in sessions if s.status == "completed"],
+        }
+    finally:
+        db.close()
+
+
+def load_targets() -> Dict[str, List[int]]:
+    """Ids of an already-seeded database, for --skip-seed runs."""
+    db = SessionLocal()
+    try:
+        sessions = db.query(models.Session.session_id, models.Session.status).all()
+        return {
+            "driver_ids": [row.driver_id for row in db.query(models.Driver.driver_id).all()],
+            "active_session_ids": [s.session_id for s in sessions if s.status == "active"],
+            "completed_session_ids": [s.session_id for s in sessions if s.status == "completed"],
+        }
+    finally:
+        db.close()
+
+
+Scenario = Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]
+
+
+def build_scenarios(targets: Dict[str, List[int]]) -> Dict[str, Scenario]:
+    drivers = targets["driver_ids"]
+    active = targets["active_session_ids"]
+    sessions = active + targets["completed_session_ids"]
+    page_count = max(len(drivers) // 50, 1)
+
+    def point(session_id: int, rng: random.Random) -> Dict:
+        return {
+            "session_id": session_id,
+            "latitude": rng.uniform(24.80, 25.05),
+            "longitude": rng.uniform(66.95, 67.25),
+            "speed": rng.uniform(0, 60),
+            "altitude": rng.uniform(5, 40),
+            "accuracy": rng.uniform(3, 25),
+            "bearing": rng.uniform(0, 360),
+        }
+
+    async def ingest_point(client, rng):
+        return await client.post(f"{API}/coordinates/", json=point(rng.choice(active), rng))
+
+    async def ingest_batch(client, rng):
+        session_id = rng.choice(active)
+        return await client.post(f"{API}/coordinates/batch", json=[point(session_id, rng) for _ in range(50)])
+
+    async def session_track(client, rng):
+        return await client.get(f"{API}/coordinates/session/{rng.choice(sessions)}", params={"limit": 500})
+
+    async def driver_sessions(client, rng):
+        return await client.get(f"{API}/sessions/driver/{rng.choice(drivers)}")
+
+    async def list_drivers(client, rng):
+        return await client.get(f"{API}/drivers/", params={"skip": rng.randrange(page_count) * 50, "limit": 50})
+
+    async def start_session(client, rng):
+        # Drivers already have an active session, so this exercises the lookup path
+        return await client.post(f"{API}/sessions/start", json={"driver_id": rng.choice(drivers)})
+
+    return {
+        "POST /coordinates/": ingest_point,
+        "POST /coordinates/batch": ingest_batch,
+        "GET /coordinates/session/{session_id}": session_track,
+        "GET /sessions/driver/{driver_id}": driver_sessions,
+        "GET /drivers/": list_drivers,
+        "POST /sessions/start": start_session,
+    }
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    count = len(latencies_ms)
+    if count >= 2:
+        cuts = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies_ms[0] if latencies_ms else 0.0
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+        "p50_ms": round(p50, 3),
+        "p95_ms": round(p95, 3),
+        "p99_ms": round(p99, 3),
+        "max_ms": round(latencies_ms[-1], 3) if latencies_ms else 0.0,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, warmup: int, seed: int
+) -> Dict:
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        await scenario(client, rng)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = perf_counter()
+            response = await scenario(client, rng)
+            latencies.append(perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, perf_counter() - started)
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    scale = FleetScale(
+        drivers=args.drivers,
+        sessions_per_driver=args.sessions_per_driver,
+        points_per_session=args.points_per_session,
+        pois=args.pois,
+        brands=args.brands,
+        campaigns_per_brand=args.campaigns_per_brand,
+    )
+    generator = FleetGenerator(scale, seed=args.seed)
+
+    # The app creates its engine lazily; seeding uses SessionLocal directly
+    get_engine()
+    if args.skip_seed:
+        targets = load_targets()
+    else:
+        if args.reset:
+            reset_schema()
+        seed_started = perf_counter()
+        targets = seed(generator)
+        print(f"Seeded {scale.as_dict()} in {perf_counter() - seed_started:.1f}s")
+
+    scenarios = build_scenarios(targets)
+    if args.endpoints:
+        scenarios = {name: scenario for name, scenario in scenarios.items() if any(f in name for f in args.endpoints)}
+
+    results = {}
+    # ASGITransport sends no lifespan events; run the app's startup and
+    # shutdown (pool warm-up, audit writer) around the load as a server would
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name, scenario in scenarios.items():
+                results[name] = await run_scenario(
+                    client, scenario, args.requests, args.concurrency, args.warmup, args.seed
+                )
+                r = results[name]
+                print(f"{name:45} {r['throughput_rps']:9.1f} req/s  p50 {r['p50_ms']:8.2f}  "
+                      f"p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms  errors {r['errors']}")
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "scale": scale.as_dict(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "endpoints": results,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drivers", type=int, default=100)
+    parser.add_argument("--sessions-per-driver", type=int, default=3)
+    parser.add_argument("--points-per-session", type=int, default=200)
+    parser.add_argument("--pois", type=int, default=500)
+    parser.add_argument("--brands", type=int, default=10)
+    parser.add_argument("--campaigns-per-brand", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--endpoints", nargs="*", help="only run endpoints whose name contains one of these")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables before seeding")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--output", help="result file (default: bench-results/<timestamp>-<revision>.json)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+    output = args.output or os.path.join(
+        "bench-results", f"{datetime.utcnow():%Y%m%dT%H%M%S}-{report['meta']['revision']}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
@@ -0,0 +1,31 @@
+"""Gunicorn settings: `gunicorn -c gunicorn.conf.py app.main:app`.
+
+Prometheus metrics are aggregated across workers through
+PROMETHEUS_MULTIPROC_DIR. prometheus_client picks its storage when it is
+first imported, so the directory is set here, in the master, before any
+worker imports the app.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "transit_api_metrics"))
+
+
+def on_starting(server):
+    # Samples left by a previous master would be added to this one's
+    directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    # Drops the exited worker's live gauges (in-progress requests, pool usage)
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+# Settings are read on import; the engine is only built on first use, so
+# placeholders are enough for tests that never touch it.
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+# Tests talk to TEST_DATABASE_URL through dependency overrides, not the app's engine
+os.environ.setdefault("STARTUP_WARMUP_ENABLED", "false")
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """A freshly migrated PostGIS database. Its public schema is dropped first."""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA IF EXISTS public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+    except OperationalError as e:
+        pytest.skip(f"test database unavailable: {e}")
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(__file__), "..", "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(os.path.dirname(__file__), "..", "alembic"))
+    with engine.connect() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
+        conn.commit()
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client(db_engine):
+    from fastapi.testclient import TestClient
+    from app.db import get_db, get_read_db
+    from app.main import app
+
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
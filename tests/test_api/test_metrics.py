@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import instrument_engine, instrumented_pool_class
+from app.db import _create_engine, get_db, get_read_db
+from app.main import create_app
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# A gunicorn worker in miniature: serves one request, then reports its pid
+# while the in-progress gauge of a second, unfinished request is still up.
+WORKER = """
+import os
+from fastapi.testclient import TestClient
+from app.core.metrics import HTTP_REQUESTS_IN_PROGRESS
+from app.main import create_app
+
+TestClient(create_app()).get("/")
+HTTP_REQUESTS_IN_PROGRESS.inc()
+print(os.getpid())
+"""
+
+
+@pytest.fixture
+def client():
+    app = create_app()
+
+    def no_db():
+        # Labels are recorded whatever the endpoint does with it
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    app.dependency_overrides[get_read_db] = no_db
+    # No `with`: the lifespan (warm-up, audit writer) stays off
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def request_count(method: str, route: str) -> float:
+    return sum(
+        sample.value
+        for metric in REGISTRY.collect()
+        if metric.name == "http_request_duration_seconds"
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+        and sample.labels["method"] == method
+        and sample.labels["route"] == route
+    )
+
+
+@pytest.mark.parametrize(
+    "method, path, route",
+    [
+        ("GET", "/", "/"),
+        ("GET", "/api/v1/drivers/", "/api/v1/drivers/"),
+        ("GET", "/api/v1/drivers/search?q=a", "/api/v1/drivers/search"),
+        ("GET", "/api/v1/events/stream?bbox=bad", "/api/v1/events/stream"),
+        ("POST", "/api/v1/drivers/", "/api/v1/drivers/"),
+        ("POST", "/api/v1/coordinates/", "/api/v1/coordinates/"),
+        ("PUT", "/api/v1/drivers/42", "/api/v1/drivers/{driver_id}"),
+        ("GET", "/api/v1/sessions/driver/7", "/api/v1/sessions/driver/{driver_id}"),
+        ("GET", "/no/such/path", "<unmatched>"),
+    ],
+)
+def test_routes_are_labelled_with_their_full_template(client, method, path, route):
+    before = request_count(method, route)
+
+    client.request(method, path, json={})
+
+    assert request_count(method, route) == before + 1
+
+
+def pool_gauge(name: str, state: str) -> float:
+    return REGISTRY.get_sample_value("db_pool_connections", {"engine": name, "state": state})
+
+
+def test_pool_gauges_follow_checkouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=2)
+    instrument_engine(engine, "gauge-test")
+
+    first = engine.connect()
+    second = engine.connect()
+    assert (pool_gauge("gauge-test", "checked_out"), pool_gauge("gauge-test", "overflow")) == (2, 1)
+
+    second.close()
+    first.close()
+    assert pool_gauge("gauge-test", "checked_out") == 0
+    # The overflow connection was closed on checkin; the pooled one stays open
+    assert (pool_gauge("gauge-test", "checked_in"), pool_gauge("gauge-test", "overflow")) == (1, 0)
+    assert pool_gauge("gauge-test", "size") == 1
+    engine.dispose()
+
+
+def checkout_waits(name: str) -> float:
+    return REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", {"engine": name}) or 0.0
+
+
+def test_pool_metrics_follow_the_engine_across_dispose(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=instrumented_pool_class("dispose-test"), pool_size=2
+    )
+    instrument_engine(engine, "dispose-test")
+    held = engine.connect()
+    assert pool_gauge("dispose-test", "checked_out") == 1
+
+    # What a forked worker does with the pool it inherited
+    engine.dispose(close=False)
+    assert (pool_gauge("dispose-test", "checked_out"), pool_gauge("dispose-test", "checked_in")) == (0, 0)
+
+    waits = checkout_waits("dispose-test")
+    with engine.connect():
+        assert pool_gauge("dispose-test", "checked_out") == 1
+    assert pool_gauge("dispose-test", "checked_in") == 1
+    assert checkout_waits("dispose-test") == waits + 1
+    held.close()
+    engine.dispose()
+
+
+def test_engine_pools_keep_their_label_when_recreated():
+    engine = _create_engine("localhost", "5432", "replica", 1, 0)
+    try:
+        engine.dispose(close=False)
+
+        assert engine.pool.metrics_label == "replica"
+    finally:
+        engine.dispose()
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    env = {**os.environ, "PYTHONPATH": ROOT, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    pids = [
+        int(subprocess.run(
+            [sys.executable, "-c", WORKER], cwd=tmp_path, env=env, capture_output=True, text=True, check=True,
+        ).stdout)
+        for _ in range(2)
+    ]
+
+    def sample(name, labels=None):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry, path=str(tmp_path))
+        return registry.get_sample_value(name, labels or {})
+
+    assert sample(
+        "http_request_duration_seconds_count", {"method": "GET", "route": "/", "status": "200"}
+    ) == 2
+    assert sample("http_requests_in_progress") == 2
+
+    # What gunicorn's child_exit hook does for an exited worker
+    mark_process_dead(pids[0], str(tmp_path))
+    assert sample("http_requests_in_progress") == 1
+    # Counts survive the worker
+    assert sample(
+        "http_request_duration_seconds_count", {"method": "GET", "route": "/", "status": "200"}
+    ) == 2
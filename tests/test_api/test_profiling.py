@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, RequestProfiler, _prune_profiles, profile_engine
+
+TOKEN = "s3cret-profile-token"
+
+
+def endpoint(work, stop):
+    while not stop.is_set():
+        work()
+
+
+def ours():
+    time.sleep(0.0005)
+
+
+def theirs():
+    time.sleep(0.0005)
+
+
+def test_only_threads_serving_the_request_are_sampled():
+    profiler = RequestProfiler({"endpoint": endpoint}, interval=0.001)
+    stop = threading.Event()
+
+    def serve_this_request():
+        profiler.register_thread()
+        endpoint(ours, stop)
+
+    # Same endpoint, different request
+    threads = [
+        threading.Thread(target=serve_this_request),
+        threading.Thread(target=endpoint, args=(theirs, stop)),
+    ]
+    profiler.start()
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    profiler.stop()
+
+    stacks = "\n".join(profiler.samples)
+    assert "ours" in stacks
+    assert "theirs" not in stacks
+
+
+def test_prune_keeps_the_newest_profiles(tmp_path):
+    for index in range(5):
+        path = tmp_path / f"{index}.json"
+        path.write_text("{}")
+        os.utime(path, (index, index))
+    (tmp_path / "notes.txt").write_text("")
+
+    _prune_profiles(str(tmp_path), keep=2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["3.json", "4.json", "notes.txt"]
+
+
+@pytest.fixture
+def profiled_client(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILING_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 1.0)
+    engine = create_engine(f"sqlite:///{tmp_path / 'profiled.db'}")
+    profile_engine(engine)
+
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/work")
+    def slow_work(n: int = 0):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            deadline = time.monotonic() + 0.05
+            while time.monotonic() < deadline:
+                sum(range(1000))
+            conn.execute(text("SELECT 2"))
+        return {"n": n}
+
+    yield TestClient(app)
+    engine.dispose()
+
+
+def stored_profiles(directory):
+    return [json.loads(path.read_text()) for path in directory.glob("*.json")]
+
+
+@pytest.mark.parametrize("how", ["header", "query"])
+def test_valid_token_stores_a_profile(profiled_client, tmp_path, how):
+    if how == "header":
+        response = profiled_client.get("/work?n=1", headers={"X-Profile-Token": TOKEN})
+    else:
+        response = profiled_client.get(f"/work?n=1&profile_token={TOKEN}")
+
+    assert response.json() == {"n": 1}
+    [profile] = stored_profiles(tmp_path)
+    assert response.headers["x-profile-id"] == profile["profile_id"]
+    assert "slow_work" in profile["folded_stacks"]
+    assert [query["statement"] for query in profile["sql"]] == ["SELECT 1", "SELECT 2"]
+    assert profile["query_string"] == "n=1"
+    assert TOKEN not in json.dumps(profile)
+
+
+@pytest.mark.parametrize(
+    "headers, query", [({}, ""), ({"X-Profile-Token": "wrong"}, ""), ({}, "&profile_token=wrong")]
+)
+def test_missing_or_wrong_token_stores_nothing(profiled_client, tmp_path, headers, query):
+    response = profiled_client.get(f"/work?n=1{query}", headers=headers)
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert stored_profiles(tmp_path) == []
@@ -0,0 +1,195 @@
+"""Every query issued by an endpoint must be answerable from an index.
+
+Each case calls an endpoint against a migrated PostGIS database, records
+the statements it ran and EXPLAINs them with sequential scans disabled.
+On tables this small the planner would pick a sequential scan anyway, so
+a "Seq Scan" that survives `enable_seqscan = off` means no index fits.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.archive_service import track_from_rows
+from app.services.cache_service import response_cache
+
+
+def driver_payload(index: int) -> dict:
+    return {
+        "name": f"Driver {index}",
+        "contact_info": {
+            "phone": f"+92300{index:07d}",
+            "email": f"driver{index}@example.com",
+            "address": "House 1, Block 2, Karachi",
+        },
+        "vehicle_details": {
+            "type": "rickshaw",
+            "make": "Sazgar",
+            "model": "Classic",
+            "year": 2020,
+            "plate_number": f"KHI-{index:06d}",
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def seeded(db_engine):
+    now = datetime.utcnow()
+    with Session(db_engine) as db:
+        drivers = []
+        for index in range(6):
+            payload = driver_payload(index)
+            drivers.append(models.Driver(status="active", registration_date=now, **payload))
+        db.add_all(drivers)
+        db.flush()
+
+        completed = models.Session(
+            driver_id=drivers[0].driver_id, start_time=now - timedelta(days=1),
+            end_time=now - timedelta(hours=20), status="completed",
+        )
+        active = models.Session(driver_id=drivers[0].driver_id, start_time=now, status="active")
+        to_end = models.Session(driver_id=drivers[2].driver_id, start_time=now, status="active")
+        history = models.Session(
+            driver_id=drivers[1].driver_id, start_time=now - timedelta(days=2),
+            end_time=now - timedelta(days=1), status="completed",
+        )
+        db.add_all([completed, active, to_end, history])
+        db.flush()
+
+        for offset in range(20):
+            db.add(models.Coordinate(
+                session_id=completed.session_id,
+                timestamp=completed.start_time + timedelta(seconds=offset),
+                location=f"SRID=4326;POINT(67.0{offset:02d} 24.9{offset:02d})",
+                speed=30.0,
+            ))
+        db.add(models.ArchivedTrack(**track_from_rows(history.session_id, [
+            (offset, history.start_time + timedelta(seconds=offset), 24.9, 67.0, 30.0, None, None, None)
+            for offset in range(20)
+        ])))
+        db.commit()
+        ids = {
+            "driver": drivers[0].driver_id,
+            "driver_without_active": drivers[1].driver_id,
+            "driver_to_delete": drivers[5].driver_id,
+            "active_session": active.session_id,
+            "completed_session": completed.session_id,
+            "session_to_end": to_end.session_id,
+            "archived_session": history.session_id,
+        }
+
+    with db_engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return ids
+
+
+def coordinate(session_id: int) -> dict:
+    return {"session_id": session_id, "latitude": 24.9, "longitude": 67.0, "speed": 12.5}
+
+
+CASES = [
+    pytest.param(lambda c, ids: c.post("/api/v1/drivers/", json=driver_payload(100)), id="create_driver"),
+    pytest.param(lambda c, ids: c.get("/api/v1/drivers/"), id="list_drivers"),
+    pytest.param(lambda c, ids: c.get("/api/v1/drivers/", params={"status": "active"}), id="list_drivers_by_status"),
+    pytest.param(
+        lambda c, ids: c.get("/api/v1/drivers/", params={"status": "active", "count": "estimated"}),
+        id="list_drivers_estimated",
+    ),
+    pytest.param(
+        lambda c, ids: c.put(f"/api/v1/drivers/{ids['driver']}", json=driver_payload(0)),
+        id="update_driver",
+    ),
+    pytest.param(
+        lambda c, ids: c.put(f"/api/v1/drivers/{ids['driver']}", json=driver_payload(200)),
+        id="update_driver_phone",
+    ),
+    pytest.param(
+        lambda c, ids: c.get("/api/v1/drivers/search", params={"q": "Drivr 3", "field": "name"}),
+        id="search_drivers_name",
+    ),
+    pytest.param(lambda c, ids: c.get("/api/v1/drivers/search", params={"q": "923000"}), id="search_drivers_phone"),
+    pytest.param(
+        lambda c, ids: c.get("/api/v1/drivers/search", params={"q": "KHI-00", "field": "plate"}),
+        id="search_drivers_plate",
+    ),
+    pytest.param(lambda c, ids: c.get("/api/v1/drivers/search", params={"q": "KHI-00"}), id="search_drivers_any"),
+    pytest.param(
+        lambda c, ids: c.patch(f"/api/v1/drivers/{ids['driver']}/status", params={"status": "active"}),
+        id="update_driver_status",
+    ),
+    pytest.param(lambda c, ids: c.delete(f"/api/v1/drivers/{ids['driver_to_delete']}"), id="delete_driver"),
+    pytest.param(
+        lambda c, ids: c.post("/api/v1/sessions/start", json={"driver_id": ids["driver"]}),
+        id="start_session_existing",
+    ),
+    pytest.param(
+        lambda c, ids: c.post("/api/v1/sessions/start", json={"driver_id": ids["driver_without_active"]}),
+        id="start_session_new",
+    ),
+    pytest.param(
+        lambda c, ids: c.post(f"/api/v1/sessions/{ids['session_to_end']}/end", json={"total_distance_km": 12.5}),
+        id="end_session",
+    ),
+    pytest.param(lambda c, ids: c.get(f"/api/v1/sessions/driver/{ids['driver']}"), id="driver_sessions"),
+    pytest.param(
+        lambda c, ids: c.get(f"/api/v1/sessions/driver/{ids['driver']}", params={"status": "completed"}),
+        id="driver_sessions_by_status",
+    ),
+    pytest.param(
+        lambda c, ids: c.post("/api/v1/coordinates/", json=coordinate(ids["active_session"])),
+        id="create_coordinate",
+    ),
+    pytest.param(
+        lambda c, ids: c.post("/api/v1/coordinates/batch", json=[coordinate(ids["active_session"])] * 3),
+        id="create_coordinates_batch",
+    ),
+    pytest.param(
+        lambda c, ids: c.get(f"/api/v1/coordinates/session/{ids['completed_session']}"),
+        id="session_coordinates",
+    ),
+    pytest.param(
+        lambda c, ids: c.get(f"/api/v1/coordinates/archive/session/{ids['archived_session']}"),
+        id="archived_session_coordinates",
+    ),
+]
+
+
+def _seq_scans(plan: dict) -> list:
+    found = [plan.get("Relation Name")] if plan["Node Type"] == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+@pytest.mark.parametrize("call", CASES)
+def test_endpoint_queries_use_indexes(call, client, db_engine, seeded):
+    # A cached response would run no statements at all
+    response_cache.clear()
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(db_engine, "before_cursor_execute", capture)
+    try:
+        response = call(client, seeded)
+    finally:
+        event.remove(db_engine, "before_cursor_execute", capture)
+
+    assert response.status_code < 400, response.text
+    assert statements
+
+    offenders = []
+    with db_engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in statements:
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            tables = _seq_scans(plan[0]["Plan"])
+            if tables:
+                offenders.append((tables, statement))
+        conn.rollback()
+
+    assert not offenders, offenders
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api.v1.endpoints.sessions import start_session
+from app.db import get_read_db
+from app.main import create_app
+
+CONCURRENT_STARTS = 8
+
+
+@pytest.fixture
+def driver_id(db_engine):
+    with Session(db_engine) as db:
+        driver = models.Driver(
+            name="Concurrent Starter",
+            status="active",
+            contact_info={"phone": "+923980000001"},
+            vehicle_details={"plate_number": "RACE-0001"},
+        )
+        db.add(driver)
+        db.commit()
+        driver_id = driver.driver_id
+    yield driver_id
+    with Session(db_engine) as db:
+        db.execute(delete(models.Session).where(models.Session.driver_id == driver_id))
+        db.execute(delete(models.Driver).where(models.Driver.driver_id == driver_id))
+        db.commit()
+
+
+def test_concurrent_starts_create_one_active_session(db_engine, driver_id):
+    barrier = threading.Barrier(CONCURRENT_STARTS)
+    results = [None] * CONCURRENT_STARTS
+
+    def start(index):
+        with Session(db_engine) as db:
+            # Line the statements up so their inserts really contend
+            barrier.wait()
+            try:
+                row = asyncio.run(start_session(schemas.SessionCreate(driver_id=driver_id), db=db))
+                results[index] = row["session_id"]
+            except Exception as e:
+                results[index] = e
+
+    threads = [threading.Thread(target=start, args=(index,)) for index in range(CONCURRENT_STARTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with Session(db_engine) as db:
+        active = db.execute(
+            select(func.array_agg(models.Session.session_id))
+            .where(models.Session.driver_id == driver_id, models.Session.status == "active")
+        ).scalar()
+
+    assert len(active) == 1
+    # Every caller got that session back, created or found
+    assert results == active * CONCURRENT_STARTS
+
+
+def test_start_for_unknown_driver_is_not_found(db_engine):
+    with Session(db_engine) as db:
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(start_session(schemas.SessionCreate(driver_id=-1), db=db))
+
+    assert error.value.status_code == 404
+
+
+def test_invalid_status_filter_is_rejected():
+    app = create_app()
+    # Rejected before any query
+    app.dependency_overrides[get_read_db] = lambda: None
+
+    response = TestClient(app).get("/api/v1/sessions/driver/1", params={"status": "bogus"})
+
+    assert response.status_code == 400
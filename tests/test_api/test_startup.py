@@ -0,0 +1,59 @@
+"""Importing the app must stay cheap and free of side effects.
+
+Every gunicorn worker and test run imports it, and whatever it opens at
+import time is inherited across fork. Each check runs in a fresh
+interpreter so modules already imported by the test session don't hide
+the cost.
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Cumulative `-X importtime` of app.main; about 1.1s on a slow dev container.
+# Generous on purpose: this catches a heavy import or I/O creeping back in,
+# not small drift. Override for unusually slow runners.
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+PROBE = """
+import os, sys
+import app.main, app.db
+print(app.db.engine is None, "psycopg2" in sys.modules, os.getenv("DOTENV_PROBE"))
+"""
+
+
+def _import_app(cwd) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    env.pop("DOTENV_PROBE", None)
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+
+
+def _cumulative_seconds(importtime_output: str, module: str) -> float:
+    # Lines look like "import time:  self [us] | cumulative | package"
+    for line in importtime_output.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1_000_000
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_import_has_no_side_effects(tmp_path):
+    (tmp_path / ".env").write_text("DOTENV_PROBE=loaded\n")
+
+    result = _import_app(tmp_path)
+
+    engine_is_none, driver_imported, dotenv_probe = result.stdout.split()
+    assert engine_is_none == "True", "app import created the database engine"
+    assert driver_imported == "False", "app import loaded the database driver"
+    assert dotenv_probe == "None", "app import copied .env into os.environ"
+    assert list(tmp_path.iterdir()) == [tmp_path / ".env"], "app import wrote files"
+
+
+def test_import_time_within_budget(tmp_path):
+    # Best of three: the budget is about our imports, not a noisy neighbour
+    seconds = min(_cumulative_seconds(_import_app(tmp_path).stderr, "app.main") for _ in range(3))
+    assert seconds <= IMPORT_BUDGET_SECONDS, f"import app.main took {seconds:.2f}s"
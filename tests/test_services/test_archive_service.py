@@ -0,0 +1,189 @@
+import importlib.util
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app import models
+from app.services.archive_service import (
+    FLOAT_COLUMNS, INTEGER_COLUMNS, decode_column, decode_track, encode_column, track_coordinates, track_from_rows,
+)
+
+START = datetime(2026, 10, 1, 8, 0, 0)
+
+# Heap bytes per point in the old archived_coordinates layout: 24-byte tuple
+# header, ids and timestamps (16), a geography point (33), five 8-byte
+# values (40), plus a 4-byte line pointer. Indexes came on top of that.
+ROW_BYTES_PER_POINT = 117
+
+
+def point(index, latitude=24.9, longitude=67.0, speed=30.0, altitude=None, bearing=None, accuracy=None):
+    return (
+        index, START + timedelta(seconds=index), latitude, longitude, speed, altitude, bearing, accuracy,
+    )
+
+
+def archived(rows, session_id=1) -> models.ArchivedTrack:
+    return models.ArchivedTrack(**track_from_rows(session_id, rows))
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [],
+        [7],
+        [1_000_000, 1_000_001, 1_000_002],
+        # Large negative deltas in both directions, and the int64 extremes
+        [5, -2**40, 2**40, 0, -7],
+        [np.iinfo(np.int64).max, np.iinfo(np.int64).min, 0, np.iinfo(np.int64).max],
+    ],
+)
+def test_integer_columns_round_trip(values):
+    values = np.asarray(values, dtype=np.int64)
+
+    decoded = decode_column(encode_column(values), as_float=False)
+
+    assert decoded.dtype == np.int64
+    np.testing.assert_array_equal(decoded, values)
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, 8, 9, 17])
+@pytest.mark.parametrize("nulls", ["none", "some", "all"])
+def test_float_columns_round_trip_with_null_bitmap(count, nulls):
+    rng = np.random.default_rng(count)
+    values = rng.uniform(-180, 180, count)
+    if nulls == "some":
+        values[::3] = np.nan
+    elif nulls == "all":
+        values[:] = np.nan
+
+    decoded = decode_column(encode_column(values, 1e7))
+
+    assert len(decoded) == count
+    np.testing.assert_array_equal(np.isnan(decoded), np.isnan(values))
+    # Quantized to 1e-7
+    np.testing.assert_allclose(decoded, np.rint(values * 1e7) / 1e7, rtol=0, atol=1e-12)
+
+
+def test_small_deltas_pack_narrow():
+    steady = np.arange(1000, dtype=np.int64)
+    jumpy = steady * 2**40
+
+    assert len(encode_column(steady)) < len(encode_column(jumpy))
+
+
+def test_track_round_trip_sorts_by_time():
+    rows = [point(2, speed=None), point(0, altitude=12.5), point(1, bearing=359.99, accuracy=4.2)]
+
+    columns = decode_track(archived(rows))
+
+    np.testing.assert_array_equal(columns["coord_ids"], [0, 1, 2])
+    assert columns["timestamps"].astype(object).tolist() == [START + timedelta(seconds=i) for i in range(3)]
+    np.testing.assert_array_equal(np.isnan(columns["speeds"]), [False, False, True])
+    assert columns["altitudes"][0] == 12.5
+    assert columns["bearings"][1] == 359.99
+
+
+def test_empty_track():
+    track = archived([])
+
+    assert track.point_count == 0
+    assert track.start_time is None and track.end_time is None
+    assert track_coordinates(track) == []
+    assert all(len(values) == 0 for values in decode_track(track).values())
+
+
+def test_track_coordinates_match_live_shape():
+    track = archived([point(0, speed=None, accuracy=5.5)], session_id=42)
+
+    assert track_coordinates(track) == [{
+        "coord_id": 0,
+        "session_id": 42,
+        "timestamp": START,
+        "latitude": 24.9,
+        "longitude": 67.0,
+        "speed": None,
+        "altitude": None,
+        "bearing": None,
+        "accuracy": 5.5,
+    }]
+
+
+def test_track_coordinates_pages_over_located_points():
+    rows = [point(index) for index in range(10)]
+    # Points without a location are left out, as by the live endpoint
+    rows[2] = point(2, latitude=None)
+    rows[5] = point(5, longitude=None)
+    track = archived(rows)
+
+    def ids(**paging):
+        return [coordinate["coord_id"] for coordinate in track_coordinates(track, **paging)]
+
+    assert ids() == [0, 1, 3, 4, 6, 7, 8, 9]
+    assert ids(skip=2, limit=3) == [3, 4, 6]
+    assert ids(skip=6) == [8, 9]
+    assert ids(skip=6, limit=10) == [8, 9]
+    assert ids(skip=20) == []
+    assert ids(limit=0) == []
+
+
+def test_unknown_encoding_is_rejected():
+    track = archived([point(0)])
+    track.encoding = 99
+
+    with pytest.raises(ValueError):
+        decode_track(track)
+
+
+def noisy_track(count: int):
+    """An hour of 1 Hz GPS: a random walk with noisy speed, altitude, bearing and accuracy."""
+    rng = np.random.default_rng(7)
+    latitudes = 24.86 + np.cumsum(rng.normal(0, 2e-5, count))
+    longitudes = 67.0 + np.cumsum(rng.normal(0, 2e-5, count))
+    speeds = np.clip(30 + np.cumsum(rng.normal(0, 0.5, count)), 0, 80)
+    altitudes = 10 + rng.normal(0, 1, count)
+    bearings = rng.uniform(0, 360, count)
+    accuracies = rng.uniform(3, 15, count)
+    return [
+        (
+            5_000_000 + index, START + timedelta(seconds=index),
+            round(latitudes[index], 6), round(longitudes[index], 6), round(speeds[index], 1),
+            round(altitudes[index], 1), round(bearings[index], 1), round(accuracies[index], 1),
+        )
+        for index in range(count)
+    ]
+
+
+def test_storage_is_ten_times_smaller_than_rows():
+    count = 3600
+    track = track_from_rows(1, noisy_track(count))
+
+    encoded = sum(len(track[name]) for name in INTEGER_COLUMNS + tuple(FLOAT_COLUMNS))
+
+    assert encoded * 10 <= ROW_BYTES_PER_POINT * count, f"{encoded / count:.1f} bytes per point"
+
+
+def _migration():
+    path = os.path.join(
+        os.path.dirname(__file__), "..", "..", "alembic", "versions", "f3a9c2e6d518_columnar_archived_tracks.py"
+    )
+    spec = importlib.util.spec_from_file_location("columnar_archived_tracks", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_tracks_compacted_by_the_migration_stay_readable():
+    # The migration carries its own frozen copy of encoding 1
+    migration = _migration()
+    rows = noisy_track(100) + [point(100, latitude=None, speed=None)]
+
+    compacted = models.ArchivedTrack(**migration.track_from_rows(1, rows))
+
+    assert track_coordinates(compacted) == track_coordinates(archived(rows))
+    for name in INTEGER_COLUMNS:
+        np.testing.assert_array_equal(
+            migration.decode_column(getattr(compacted, name), as_float=False),
+            decode_track(compacted)[name].astype(np.int64),
+        )
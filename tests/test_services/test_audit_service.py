@@ -0,0 +1,273 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import delete, select, update
+
+from app import models
+from app.api.v1.endpoints.drivers import DriverStatus, delete_driver, update_driver_status
+from app.db import SessionLocal
+from app.services import audit_service
+from app.services.audit_service import AuditLogWriter, record_change
+
+
+def entry(entity_id: int) -> dict:
+    return {"entity_type": "driver", "entity_id": entity_id, "action": "update", "changes": {}}
+
+
+def dropped_total() -> float:
+    return REGISTRY.get_sample_value("audit_events_dropped_total") or 0.0
+
+
+class RecordingWriter(AuditLogWriter):
+    """Keeps batches instead of inserting them; `gate` holds each write until set."""
+
+    def __init__(self, **kwargs):
+        options = dict(max_size=100, batch_size=100, flush_interval=0.01, policy="drop", block_timeout=0.05)
+        options.update(kwargs)
+        super().__init__(**options)
+        self.batches = []
+        self.writing = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def _write(self, batch):
+        if not batch:
+            return
+        self.writing.set()
+        self.gate.wait(5)
+        self.batches.append([item["entity_id"] for item in batch])
+
+
+@pytest.fixture
+def writers(monkeypatch):
+    # The engine is only needed by the real _write
+    monkeypatch.setattr(audit_service, "get_engine", lambda: None)
+    started = []
+
+    def make(**kwargs):
+        writer = RecordingWriter(**kwargs)
+        writer.start()
+        started.append(writer)
+        return writer
+
+    yield make
+    for writer in started:
+        writer.gate.set()
+        writer.stop()
+
+
+def wait_until_writing(writer):
+    assert writer.writing.wait(5), "writer never picked up the first entry"
+
+
+def test_enqueue_without_running_writer_is_a_noop():
+    writer = RecordingWriter()
+
+    writer.enqueue([entry(1)])
+
+    assert writer._queue.qsize() == 0
+
+
+def test_entries_are_written_in_batches(writers):
+    writer = writers(batch_size=2, flush_interval=60)
+
+    writer.enqueue([entry(i) for i in range(5)])
+    writer.stop()
+
+    assert writer.batches == [[0, 1], [2, 3], [4]]
+
+
+def test_stop_drains_the_queue(writers):
+    writer = writers(flush_interval=60)
+
+    writer.enqueue([entry(i) for i in range(3)])
+    writer.stop()
+
+    assert not writer.running
+    assert [i for batch in writer.batches for i in batch] == [0, 1, 2]
+
+
+def test_flush_interval_writes_partial_batches(writers):
+    writer = writers(batch_size=100, flush_interval=0.01)
+
+    writer.enqueue([entry(1)])
+    wait_until_writing(writer)
+
+    assert writer.running
+    deadline = time.monotonic() + 5
+    while not writer.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.batches == [[1]]
+
+
+def test_drop_policy_discards_when_full(writers):
+    writer = writers(max_size=2, batch_size=1, policy="drop")
+    writer.gate.clear()
+    writer.enqueue([entry(0)])
+    wait_until_writing(writer)
+    before = dropped_total()
+
+    # 0 is being written; 1 and 2 fill the queue
+    writer.enqueue([entry(i) for i in range(1, 5)])
+
+    assert dropped_total() - before == 2
+    writer.gate.set()
+    writer.stop()
+    assert writer.batches == [[0], [1], [2]]
+
+
+def test_block_policy_waits_for_space(writers):
+    writer = writers(max_size=1, batch_size=1, policy="block", block_timeout=5)
+    writer.gate.clear()
+    writer.enqueue([entry(0)])
+    wait_until_writing(writer)
+    writer.enqueue([entry(1)])
+    before = dropped_total()
+
+    threading.Timer(0.05, writer.gate.set).start()
+    # Blocks until the writer frees a slot
+    writer.enqueue([entry(2)])
+
+    assert dropped_total() == before
+    writer.stop()
+    assert writer.batches == [[0], [1], [2]]
+
+
+def test_block_policy_drops_after_timeout(writers):
+    writer = writers(max_size=1, batch_size=1, policy="block", block_timeout=0.01)
+    writer.gate.clear()
+    writer.enqueue([entry(0)])
+    wait_until_writing(writer)
+    writer.enqueue([entry(1)])
+    before = dropped_total()
+
+    writer.enqueue([entry(2)])
+
+    assert dropped_total() - before == 1
+
+
+def test_block_policy_never_blocks_the_event_loop(writers):
+    writer = writers(max_size=1, batch_size=1, policy="block", block_timeout=5)
+    writer.gate.clear()
+    writer.enqueue([entry(0)])
+    wait_until_writing(writer)
+    writer.enqueue([entry(1)])
+    before = dropped_total()
+
+    async def commit_in_async_endpoint():
+        started = time.monotonic()
+        writer.enqueue([entry(2)])
+        return time.monotonic() - started
+
+    assert asyncio.run(commit_in_async_endpoint()) < 1
+    assert dropped_total() - before == 1
+
+
+class Recorder:
+    def __init__(self):
+        self.entries = []
+
+    def enqueue(self, entries):
+        self.entries.extend(entries)
+
+
+@pytest.fixture
+def recorded(monkeypatch, db_engine):
+    """Audit entries the session hooks hand to the writer, with SessionLocal bound to the test database."""
+    recorder = Recorder()
+    monkeypatch.setattr(audit_service, "audit_writer", recorder)
+    monkeypatch.setitem(SessionLocal.kw, "bind", db_engine)
+    yield recorder.entries
+    with SessionLocal() as db:
+        db.execute(delete(models.Driver).where(models.Driver.name.like("Audited %")))
+        db.commit()
+
+
+def new_driver(index: int) -> models.Driver:
+    return models.Driver(
+        name=f"Audited {index}",
+        status="active",
+        contact_info={"phone": f"+92397000000{index}"},
+        vehicle_details={"plate_number": f"AUD-000{index}"},
+    )
+
+
+def test_flush_hooks_record_creates_and_updates(recorded):
+    with SessionLocal() as db:
+        driver = new_driver(1)
+        db.add(driver)
+        db.commit()
+        db.refresh(driver)
+        driver_id = driver.driver_id
+        driver.status = "suspended"
+        db.commit()
+
+    create, change = recorded
+    assert (create["entity_type"], create["entity_id"], create["action"]) == ("driver", driver_id, "create")
+    assert create["changes"]["name"] == {"new": "Audited 1"}
+    # Generated columns are not audited
+    assert "phone" not in create["changes"]
+    assert (change["action"], change["changes"]) == ("update", {"status": {"old": "active", "new": "suspended"}})
+
+
+def test_rolled_back_changes_are_not_recorded(recorded):
+    with SessionLocal() as db:
+        db.add(new_driver(2))
+        db.flush()
+        db.rollback()
+
+    assert recorded == []
+
+
+def test_record_change_is_written_on_commit(recorded):
+    with SessionLocal() as db:
+        driver = new_driver(3)
+        db.add(driver)
+        db.commit()
+        driver_id = driver.driver_id
+        recorded.clear()
+
+        db.execute(update(models.Driver).where(models.Driver.driver_id == driver_id).values(status="inactive"))
+        record_change(db, "driver", driver_id, "update", {"status": {"new": "inactive"}})
+        assert recorded == []
+        db.commit()
+
+    assert [(e["entity_id"], e["changes"]) for e in recorded] == [(driver_id, {"status": {"new": "inactive"}})]
+
+
+def test_status_endpoints_record_the_status_they_replaced(recorded):
+    with SessionLocal() as db:
+        driver = new_driver(4)
+        db.add(driver)
+        db.commit()
+        driver_id = driver.driver_id
+    recorded.clear()
+
+    with SessionLocal() as db:
+        assert update_driver_status(driver_id, DriverStatus.SUSPENDED, db=db).status == "suspended"
+    with SessionLocal() as db:
+        delete_driver(driver_id, db=db)
+
+    assert [(e["action"], e["changes"]) for e in recorded] == [
+        ("update", {"status": {"old": "active", "new": "suspended"}}),
+        ("delete", {"status": {"old": "suspended", "new": "inactive"}}),
+    ]
+
+
+def test_writer_inserts_audit_rows(monkeypatch, db_engine):
+    monkeypatch.setattr(audit_service, "get_engine", lambda: None)
+    monkeypatch.setitem(SessionLocal.kw, "bind", db_engine)
+    writer = AuditLogWriter(max_size=10, batch_size=10, flush_interval=60, policy="drop", block_timeout=0.05)
+    writer.start()
+
+    writer.enqueue([{**entry(-7), "changes": {"status": {"new": "inactive"}}}])
+    writer.stop()
+
+    with SessionLocal() as db:
+        rows = db.execute(select(models.AuditLog).where(models.AuditLog.entity_id == -7)).scalars().all()
+        assert [(row.entity_type, row.changes) for row in rows] == [("driver", {"status": {"new": "inactive"}})]
+        db.execute(delete(models.AuditLog).where(models.AuditLog.entity_id == -7))
+        db.commit()
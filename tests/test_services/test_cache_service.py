@@ -0,0 +1,174 @@
+import pytest
+from starlette.requests import Request
+
+from app.services.cache_service import ResponseCache
+
+
+def request(if_none_match=None) -> Request:
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": headers})
+
+
+def put(cache, key, body=b"x" * 10, tags=("t",), immutable=True, generation=None):
+    return cache.put(
+        key, body, tags=list(tags), immutable=immutable,
+        generation=cache.generation if generation is None else generation,
+    )
+
+
+def test_lru_evicts_least_recently_used_over_byte_budget():
+    cache = ResponseCache(max_bytes=30, ttl=60)
+    put(cache, "a")
+    put(cache, "b")
+    put(cache, "c")
+    # "a" becomes the most recently used
+    assert cache.get("a") is not None
+
+    put(cache, "d")
+
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+
+
+def test_body_larger_than_budget_is_not_cached():
+    cache = ResponseCache(max_bytes=5, ttl=60)
+
+    entry = put(cache, "a", body=b"x" * 6)
+
+    assert entry.body == b"x" * 6
+    assert cache.get("a") is None
+
+
+def test_replacing_a_key_keeps_size_accounting():
+    cache = ResponseCache(max_bytes=20, ttl=60)
+    put(cache, "a", body=b"x" * 10)
+    put(cache, "a", body=b"y" * 10)
+    put(cache, "b", body=b"z" * 10)
+
+    assert cache.get("a").body == b"y" * 10
+    assert cache.get("b") is not None
+
+
+def test_mutable_entries_expire_after_ttl():
+    cache = ResponseCache(max_bytes=1000, ttl=0)
+    put(cache, "mutable", immutable=False)
+    put(cache, "immutable", immutable=True)
+
+    assert cache.get("mutable") is None
+    # Immutable entries ignore the TTL
+    assert cache.get("immutable") is not None
+
+
+def test_invalidate_removes_only_tagged_entries():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    put(cache, "a", tags=["session:1:coordinates"])
+    put(cache, "b", tags=["session:2:coordinates", "drivers"])
+    put(cache, "c", tags=["drivers"])
+
+    cache.invalidate("drivers")
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is None
+
+
+def test_put_refuses_response_read_before_its_tag_was_invalidated():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    generation = cache.generation
+
+    cache.invalidate("session:1:coordinates")
+    put(cache, "a", tags=["session:1:coordinates"], generation=generation)
+
+    assert cache.get("a") is None
+
+
+def test_put_ignores_invalidations_of_other_tags():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    generation = cache.generation
+
+    # e.g. coordinate ingest for another session while this one is read
+    cache.invalidate("session:2:coordinates")
+    put(cache, "a", tags=["session:1:coordinates"], generation=generation)
+
+    assert cache.get("a") is not None
+
+
+def test_put_after_invalidation_is_cached():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    cache.invalidate("session:1:coordinates")
+
+    put(cache, "a", tags=["session:1:coordinates"])
+
+    assert cache.get("a") is not None
+
+
+def test_put_refuses_reads_that_began_before_clear():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    generation = cache.generation
+
+    cache.clear()
+    put(cache, "a", generation=generation)
+
+    assert cache.get("a") is None
+
+
+def test_forgotten_invalidations_still_guard_older_reads():
+    cache = ResponseCache(max_bytes=1000, ttl=60, max_tracked_tags=2)
+    generation = cache.generation
+    cache.invalidate("session:1:coordinates")
+    # Pushes session 1 out of the tracked tags
+    cache.invalidate("session:2:coordinates")
+    cache.invalidate("session:3:coordinates")
+
+    put(cache, "a", tags=["session:1:coordinates"], generation=generation)
+    assert cache.get("a") is None
+
+    # Reads that began after it are unaffected
+    put(cache, "b", tags=["session:1:coordinates"])
+    assert cache.get("b") is not None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ResponseCache(max_bytes=1000, ttl=60, enabled=False)
+
+    put(cache, "a")
+
+    assert cache.get("a") is None
+
+
+def test_response_carries_etag_and_cache_control():
+    cache = ResponseCache(max_bytes=1000, ttl=60)
+    immutable = put(cache, "a", body=b"[1]", immutable=True)
+    mutable = put(cache, "b", body=b"[2]", immutable=False)
+
+    response = immutable.to_response(request())
+
+    assert response.status_code == 200
+    assert response.body == b"[1]"
+    assert response.headers["etag"] == immutable.etag
+    assert "immutable" in response.headers["cache-control"]
+    assert mutable.to_response(request()).headers["cache-control"] == "private, no-cache"
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ["{etag}", "W/{etag}", '"other", {etag}', '"other",W/{etag}', "*", " * "],
+)
+def test_matching_if_none_match_returns_304(if_none_match):
+    entry = put(ResponseCache(max_bytes=1000, ttl=60), "a", body=b"[1]")
+
+    response = entry.to_response(request(if_none_match.format(etag=entry.etag)))
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == entry.etag
+
+
+@pytest.mark.parametrize("if_none_match", ['"other"', 'W/"other"', ""])
+def test_other_if_none_match_returns_body(if_none_match):
+    entry = put(ResponseCache(max_bytes=1000, ttl=60), "a", body=b"[1]")
+
+    response = entry.to_response(request(if_none_match))
+
+    assert response.status_code == 200
+    assert response.body == b"[1]"
@@ -0,0 +1,202 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.services.event_service import Event, EventBroker, EventFilter, RedisEventRelay, _decode_event, _encode_event
+
+
+def event(id=1, type="coordinate", key=None, driver_id=1, location=(67.0, 24.9)) -> Event:
+    return Event(id, type, {"id": id}, key=key, driver_id=driver_id, location=location)
+
+
+def test_empty_filter_matches_everything():
+    assert EventFilter().matches(event())
+    assert EventFilter().matches(event(driver_id=None, location=None))
+
+
+def test_filter_by_driver_and_type():
+    event_filter = EventFilter(driver_ids=[1, 2], event_types=["session.started"])
+
+    assert event_filter.matches(event(type="session.started", driver_id=2))
+    assert not event_filter.matches(event(type="coordinate", driver_id=2))
+    assert not event_filter.matches(event(type="session.started", driver_id=3))
+
+
+def test_filter_by_bbox():
+    event_filter = EventFilter.from_params(bbox="67,24,68,25")
+
+    assert event_filter.matches(event(location=(67.5, 24.5)))
+    # Edges are inclusive
+    assert event_filter.matches(event(location=(68.0, 25.0)))
+    assert not event_filter.matches(event(location=(66.9, 24.5)))
+    assert not event_filter.matches(event(location=None))
+
+
+@pytest.mark.parametrize("bbox", ["67,24,68", "a,b,c,d", "68,24,67,25"])
+def test_invalid_bbox(bbox):
+    with pytest.raises(ValueError):
+        EventFilter.from_params(bbox=bbox)
+
+
+def test_publish_fans_out_to_matching_subscribers():
+    async def scenario():
+        broker = EventBroker()
+        everyone = broker.subscribe(EventFilter())
+        driver_2 = broker.subscribe(EventFilter(driver_ids=[2]))
+
+        broker.publish("coordinate", {"n": 1}, driver_id=1)
+        broker.publish("coordinate", {"n": 2}, driver_id=2)
+
+        return (
+            [e.data["n"] for e in await everyone.next_batch(timeout=1)],
+            [e.data["n"] for e in await driver_2.next_batch(timeout=1)],
+        )
+
+    assert asyncio.run(scenario()) == ([1, 2], [2])
+
+
+def test_updates_for_the_same_session_are_coalesced():
+    async def scenario():
+        broker = EventBroker()
+        subscription = broker.subscribe(EventFilter())
+
+        broker.publish("coordinate", {"n": 1}, key=("coordinate", 10))
+        broker.publish("coordinate", {"n": 2}, key=("coordinate", 11))
+        broker.publish("coordinate", {"n": 3}, key=("coordinate", 10))
+        # Unkeyed events are never coalesced
+        broker.publish("session.ended", {"n": 4})
+        broker.publish("session.ended", {"n": 5})
+
+        batch = await subscription.next_batch(timeout=1)
+        return [e.data["n"] for e in batch], subscription.dropped
+
+    # The superseded update goes; the newest takes its place at the end
+    assert asyncio.run(scenario()) == ([2, 3, 4, 5], 0)
+
+
+def test_full_buffer_drops_oldest_and_counts_it():
+    async def scenario():
+        broker = EventBroker()
+        subscription = broker.subscribe(EventFilter(), max_buffer=3)
+
+        for n in range(5):
+            broker.publish("coordinate", {"n": n})
+
+        batch = await subscription.next_batch(timeout=1)
+        return [e.data["n"] for e in batch], subscription.dropped
+
+    assert asyncio.run(scenario()) == ([2, 3, 4], 2)
+
+
+def test_next_batch_times_out_empty():
+    async def scenario():
+        subscription = EventBroker().subscribe(EventFilter())
+        return await subscription.next_batch(timeout=0.01)
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_unsubscribed_clients_receive_nothing():
+    async def scenario():
+        broker = EventBroker()
+        subscription = broker.subscribe(EventFilter())
+        other = broker.subscribe(EventFilter())
+        broker.unsubscribe(subscription)
+
+        broker.publish("coordinate", {"n": 1})
+
+        return (
+            broker.subscriber_count,
+            await subscription.next_batch(timeout=0.01),
+            len(await other.next_batch(timeout=1)),
+        )
+
+    assert asyncio.run(scenario()) == (1, [], 1)
+
+
+def test_offer_from_another_thread_wakes_the_subscriber():
+    async def scenario():
+        broker = EventBroker()
+        subscription = broker.subscribe(EventFilter())
+        # Sync endpoints publish from the threadpool
+        await asyncio.to_thread(broker.publish, "coordinate", {"n": 1})
+        return [e.data["n"] for e in await subscription.next_batch(timeout=1)]
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_relayed_events_decode_to_what_was_published():
+    published = (
+        "session.started", {"session_id": 3, "start_time": datetime(2026, 10, 19, 8, 30)},
+        ("coordinate", 3), 7, (67.0, 24.9),
+    )
+
+    event_type, data, key, driver_id, location = _decode_event(_encode_event(*published))
+
+    assert (event_type, key, driver_id, location) == ("session.started", ("coordinate", 3), 7, (67.0, 24.9))
+    # The same JSON the endpoints would have sent
+    assert data == {"session_id": 3, "start_time": "2026-10-19T08:30:00"}
+    assert _decode_event(_encode_event("session.ended", {}, None, None, None))[2:] == (None, None, None)
+
+
+@pytest.fixture
+def relays():
+    """Relays sharing a fresh channel on TEST_REDIS_URL, one per simulated worker."""
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL is not set")
+    import redis
+
+    try:
+        redis.Redis.from_url(url, socket_timeout=2).ping()
+    except redis.RedisError as e:
+        pytest.skip(f"test Redis unavailable: {e}")
+    channel = f"test:events:{uuid.uuid4().hex}"
+    started = []
+
+    def make():
+        relay = RedisEventRelay(EventBroker(), url, channel, max_pending=100)
+        relay.start()
+        started.append(relay)
+        return relay
+
+    yield make
+    for relay in started:
+        relay.stop()
+
+
+def test_relay_delivers_to_subscribers_of_every_worker(relays):
+    async def scenario():
+        publisher, other = relays(), relays()
+        local = publisher.broker.subscribe(EventFilter())
+        remote = other.broker.subscribe(EventFilter(driver_ids=[2]))
+
+        publisher.broker.publish("coordinate", {"n": 1}, key=("coordinate", 10), driver_id=1)
+        publisher.broker.publish("coordinate", {"n": 2}, key=("coordinate", 11), driver_id=2)
+
+        seen = {"local": [], "remote": []}
+        for name, subscription, expected in (("local", local, 2), ("remote", remote, 1)):
+            while len(seen[name]) < expected:
+                batch = await subscription.next_batch(timeout=5)
+                assert batch, f"{name} subscriber got nothing"
+                seen[name] += [e.data["n"] for e in batch]
+        # Nothing arrives twice
+        assert await local.next_batch(timeout=0.2) == []
+        return seen
+
+    assert asyncio.run(scenario()) == {"local": [1, 2], "remote": [2]}
+
+
+def test_stopped_relay_falls_back_to_local_delivery(relays):
+    async def scenario():
+        relay = relays()
+        subscription = relay.broker.subscribe(EventFilter())
+        relay.stop()
+
+        relay.broker.publish("coordinate", {"n": 1})
+        return [e.data["n"] for e in await subscription.next_batch(timeout=1)]
+
+    assert asyncio.run(scenario()) == [1]
@@ -0,0 +1,247 @@
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.poi_service import DAYS, HOURS, POIFootfall, POISnapshot, footfall_matrix, weekday_hour
+
+# Shaped like the rows of POIFootfall._query
+Row = namedtuple("Row", "poi_id category longitude latitude footfall_estimate peak_hours updated_at")
+
+
+def row(poi_id, category="cafe", peak_hours=None, footfall_estimate=None, location=(67.0, 24.9)):
+    return Row(poi_id, category, *location, footfall_estimate, peak_hours, datetime(2026, 10, 1))
+
+
+def table(*rows) -> POIFootfall:
+    footfall = POIFootfall(refresh_interval=60)
+    footfall._snapshot = footfall._merge(POISnapshot.empty(), list(rows))
+    return footfall
+
+
+def test_matrix_from_per_day_hours():
+    matrix = footfall_matrix({"0": {"8": 100, "9": None}, "6": {"23": 7}}, 2400)
+
+    assert matrix.shape == (DAYS, HOURS)
+    assert matrix[0, 8] == 100
+    # Null counts as no footfall
+    assert matrix[0, 9] == 0
+    assert matrix[6, 23] == 7
+    # Given hours replace the estimate entirely
+    assert matrix.sum() == 107
+
+
+def test_matrix_from_same_hours_every_day():
+    matrix = footfall_matrix({"8": 50, "17": 80}, None)
+
+    np.testing.assert_array_equal(matrix[:, 8], [50] * DAYS)
+    np.testing.assert_array_equal(matrix[:, 17], [80] * DAYS)
+    assert matrix.sum() == 130 * DAYS
+
+
+def test_matrix_from_one_day_list_broadcasts():
+    matrix = footfall_matrix(list(range(HOURS)), None)
+
+    for day in range(DAYS):
+        np.testing.assert_array_equal(matrix[day], np.arange(HOURS))
+
+
+def test_matrix_from_week_list():
+    week = [[day * 100 + hour for hour in range(HOURS)] for day in range(DAYS)]
+
+    np.testing.assert_array_equal(footfall_matrix(week, None), np.asarray(week, dtype=np.float32))
+
+
+@pytest.mark.parametrize("peak_hours", [None, {}, []])
+def test_matrix_without_peak_hours_spreads_the_estimate(peak_hours):
+    np.testing.assert_allclose(footfall_matrix(peak_hours, 2400), np.full((DAYS, HOURS), 100.0))
+    assert not footfall_matrix(peak_hours, None).any()
+
+
+@pytest.mark.parametrize(
+    "peak_hours",
+    [{"-1": {"8": 1}}, {"7": {"8": 1}}, {"0": {"-1": 1}}, {"0": {"24": 1}}, {"-1": 1}, {"24": 1}, [1] * 25],
+)
+def test_matrix_rejects_out_of_range_days_and_hours(peak_hours):
+    with pytest.raises(ValueError):
+        footfall_matrix(peak_hours, None)
+
+
+def test_weekday_hour():
+    weekdays, hours = weekday_hour(
+        np.array(["2026-10-19T07:30", "2026-10-25T23:59", "1970-01-01T00:00"], dtype="datetime64[m]")
+    )
+
+    # A Monday, a Sunday and a Thursday
+    np.testing.assert_array_equal(weekdays, [0, 6, 3])
+    np.testing.assert_array_equal(hours, [7, 23, 0])
+
+
+def test_footfall_lookups():
+    footfall = table(row(3, peak_hours={"0": {"8": 100}}), row(10, footfall_estimate=240))
+
+    assert footfall.footfall(3, 0, 8) == 100
+    assert footfall.footfall(3, 1, 8) == 0
+    assert footfall.footfall(10, 4, 12) == 10
+
+
+@pytest.mark.parametrize("poi_id", [-1, 0, 5, 11, 10**9])
+def test_unknown_pois_have_no_footfall(poi_id):
+    footfall = table(row(3, footfall_estimate=240), row(10, footfall_estimate=240))
+
+    assert footfall.footfall(poi_id, 0, 0) == 0.0
+    assert footfall.footfall_batch([poi_id], 0, 0).tolist() == [0.0]
+
+
+def test_sparse_ids_are_looked_up_without_a_dense_array():
+    footfall = table(row(3, footfall_estimate=240), row(2**40, footfall_estimate=480), row(7, footfall_estimate=24))
+
+    # An array indexed by id would need 2**40 entries
+    assert footfall.snapshot.rows is None
+    assert footfall.footfall(2**40, 0, 0) == 20
+    assert footfall.footfall(2**40 + 1, 0, 0) == 0
+    np.testing.assert_array_equal(
+        footfall.footfall_batch([7, 2**40, 3, -1, 5, 2**41], 0, 0), [1, 20, 10, 0, 0, 0]
+    )
+
+
+def test_footfall_batch_broadcasts_scalars():
+    footfall = table(row(3, peak_hours={"0": {"8": 100}, "1": {"9": 5}}), row(10, footfall_estimate=240))
+
+    np.testing.assert_array_equal(footfall.footfall_batch([3, 10, 99, 3], 0, 8), [100, 10, 0, 100])
+    np.testing.assert_array_equal(footfall.footfall_batch([3, 3, 10], [0, 1, 6], [8, 9, 0]), [100, 5, 10])
+    assert footfall.footfall_batch([], 0, 0).shape == (0,)
+
+
+@pytest.mark.parametrize("weekday, hour", [(-1, 0), (7, 0), (0, -1), (0, 24)])
+def test_out_of_range_weekday_or_hour_is_rejected(weekday, hour):
+    footfall = table(row(3, footfall_estimate=240))
+
+    with pytest.raises(ValueError):
+        footfall.footfall(3, weekday, hour)
+    with pytest.raises(ValueError):
+        footfall.footfall_batch([3, 3], [0, weekday], [0, hour])
+    # Unknown POIs are no excuse
+    with pytest.raises(ValueError):
+        footfall.footfall(999, weekday, hour)
+
+
+def test_merge_replaces_changed_pois_and_appends_new_ones():
+    footfall = table(row(1, "cafe", footfall_estimate=24), row(2, "mall", footfall_estimate=48))
+    base = footfall.snapshot
+
+    merged = footfall._merge(base, [
+        row(2, "cinema", footfall_estimate=240, location=(None, None)),
+        row(5, None, footfall_estimate=2400),
+    ])
+
+    assert sorted(merged.poi_ids.tolist()) == [1, 2, 5]
+    assert merged.categories == ["cafe", "mall", "cinema"]
+    assert merged.category_codes[merged.row(2)] == 2
+    assert merged.category_codes[merged.row(5)] == -1
+    assert np.isnan(merged.locations[merged.row(2)]).all()
+    assert merged.footfall[merged.row(2), 0, 0] == 10
+    assert merged.footfall[merged.row(5), 0, 0] == 100
+    # The old snapshot is left alone for readers still holding it
+    assert base.footfall[base.row(2), 0, 0] == 2
+    assert footfall._merge(base, []) is base
+
+
+def test_merge_falls_back_to_estimate_for_unreadable_peak_hours():
+    footfall = table(row(1, peak_hours={"0": {"99": 5}}, footfall_estimate=240), row(2, peak_hours="busy"))
+
+    assert footfall.footfall(1, 0, 0) == 10
+    assert footfall.footfall_batch([2], 0, 0).tolist() == [0.0]
+
+
+def test_snapshot_arrays_are_read_only():
+    snapshot = table(row(1, footfall_estimate=24)).snapshot
+
+    with pytest.raises(ValueError):
+        snapshot.footfall[0, 0, 0] = 1
+
+
+@pytest.fixture
+def db(db_engine):
+    # Rolled back afterwards so other tests see none of these POIs
+    with db_engine.connect() as conn:
+        transaction = conn.begin()
+        with Session(bind=conn) as session:
+            yield session
+        transaction.rollback()
+
+
+def add_poi(db, name, footfall_estimate, updated_at):
+    poi = models.POI(
+        name=name, category="cafe", location="SRID=4326;POINT(67.0 24.9)",
+        footfall_estimate=footfall_estimate, updated_at=updated_at,
+    )
+    db.add(poi)
+    db.flush()
+    return poi.poi_id
+
+
+def test_refresh_applies_updates_inserts_and_deletions(db):
+    long_ago = datetime(2020, 1, 1)
+    first = add_poi(db, "First", 24, long_ago)
+    second = add_poi(db, "Second", 48, long_ago)
+    footfall = POIFootfall(refresh_interval=0)
+
+    assert footfall.refresh(db, full=True) >= 2
+    assert footfall.footfall(first, 0, 0) == 1
+    assert footfall.footfall(second, 0, 0) == 2
+
+    # Incremental: only rows changed since the watermark are read
+    db.get(models.POI, first).footfall_estimate = 240
+    third = add_poi(db, "Third", 2400, datetime.utcnow())
+    db.flush()
+    assert footfall.refresh(db) >= 2
+    assert footfall.footfall(first, 0, 0) == 10
+    assert footfall.footfall(third, 0, 0) == 100
+
+    # Deletions leave no updated_at trail; the count check forces a full reload
+    db.execute(delete(models.POI).where(models.POI.poi_id == second))
+    footfall.refresh(db)
+    assert footfall.snapshot.row(second) == -1
+    assert footfall.footfall(second, 0, 0) == 0
+    assert footfall.footfall(first, 0, 0) == 10
+
+    # A delete plus an insert the incremental query misses (its updated_at
+    # lags the watermark) keep the count; the sum of ids still differs
+    db.execute(delete(models.POI).where(models.POI.poi_id == third))
+    fourth = add_poi(db, "Fourth", 24, long_ago)
+    footfall.refresh(db)
+    assert footfall.snapshot.row(third) == -1
+    assert footfall.footfall(fourth, 0, 0) == 1
+
+
+def test_every_nth_refresh_reloads_everything(db):
+    long_ago = datetime(2020, 1, 1)
+    poi = add_poi(db, "Quiet", 24, long_ago)
+    footfall = POIFootfall(refresh_interval=0, full_reload_every=2)
+    footfall.refresh(db, full=True)
+
+    # A change that leaves updated_at behind, e.g. a bulk fix made by hand
+    db.execute(
+        update(models.POI).where(models.POI.poi_id == poi).values(footfall_estimate=240, updated_at=long_ago)
+    )
+    footfall.refresh(db)
+
+    assert footfall.footfall(poi, 0, 0) == 10
+
+
+def test_ensure_fresh_loads_once_per_interval(db):
+    poi = add_poi(db, "Fresh", 24, datetime(2020, 1, 1))
+    footfall = POIFootfall(refresh_interval=3600)
+
+    assert footfall.ensure_fresh(db).row(poi) >= 0
+    db.get(models.POI, poi).footfall_estimate = 240
+    db.flush()
+
+    # Within the interval the loaded snapshot is reused
+    assert footfall.ensure_fresh(db) is footfall.snapshot
+    assert footfall.footfall(poi, 0, 0) == 1